@@ -6,17 +6,51 @@ from .models import *
 from django.utils.safestring import mark_safe
 from django.http.response import Http404, HttpResponse
 from django import forms
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 import csv
 import io
 
-def with_inline_organization_permissions(get_organization=lambda x: x):
+class OrganizationPermissions:
+    """The organizations a user administers or advises, loaded in one query and kept on the request."""
+
+    def __init__(self, user):
+        self.user_id = user.pk
+        self.admin = set()
+        self.advisor = set()
+        admins = Organization.admins.through.objects.filter(user=user).values_list(
+            "organization_id", Value(False, output_field=BooleanField())
+        )
+        advisors = Organization.advisors.through.objects.filter(user=user).values_list(
+            "organization_id", Value(True, output_field=BooleanField())
+        )
+        for organization_id, is_advisor in admins.union(advisors, all=True):
+            (self.advisor if is_advisor else self.admin).add(organization_id)
+        self.organization_ids = self.admin | self.advisor
+
+    @classmethod
+    def for_request(cls, request):
+        permissions = getattr(request, "_organization_permissions", None)
+        if permissions is None or permissions.user_id != request.user.pk:
+            permissions = request._organization_permissions = cls(request.user)
+        return permissions
+
+    def can_manage(self, organization_id):
+        return organization_id in self.organization_ids
+
+    def is_advisor(self, organization_id):
+        return organization_id in self.advisor
+
+
+def with_inline_organization_permissions(get_organization_id=lambda x: x.pk):
     def deco(cls):
         class Admin(cls):
             def has_view_permission(self, request, obj=None):
                 if obj is None or request.user.is_superuser:
                     return True
-                org = get_organization(obj)
-                return org.is_admin(request.user) or org.is_advisor(request.user)
+                return OrganizationPermissions.for_request(request).can_manage(get_organization_id(obj))
 
             def has_change_permission(self, request, obj=None):
                 return self.has_view_permission(request, obj)
@@ -32,7 +66,9 @@ def with_inline_organization_permissions(get_organization=lambda x: x):
     return deco
 
 
-def with_organization_permissions(get_organization=lambda x: x.organization, organization_field="organization"):
+def with_organization_permissions(
+    get_organization_id=lambda x: x.organization_id, organization_field="organization"
+):
     def deco(cls):
         class Admin(cls):
             def has_module_permission(self, request):
@@ -40,8 +76,7 @@ def with_organization_permissions(get_organization=lambda x: x.organization, org
             def has_view_permission(self, request, obj=None):
                 if obj is None or request.user.is_superuser:
                     return True
-                org = get_organization(obj)
-                return org.is_admin(request.user) or org.is_advisor(request.user)
+                return OrganizationPermissions.for_request(request).can_manage(get_organization_id(obj))
             def has_change_permission(self, request, obj=None):
                 return self.has_view_permission(request, obj)
             def has_delete_permission(self, request, obj=None):
@@ -50,19 +85,17 @@ def with_organization_permissions(get_organization=lambda x: x.organization, org
                 qs = super().get_queryset(request)
                 if request.user.is_superuser:
                     return qs
-                return qs.filter(
-                    Q(**{f"{organization_field}__admins": request.user})
-                    | Q(**{f"{organization_field}__advisors": request.user})
-                ).distinct()
+                organization_ids = OrganizationPermissions.for_request(request).organization_ids
+                return qs.filter(**{f"{organization_field}__in": organization_ids})
             def get_form(self, request, obj=None, change=False, **kwargs):
                 if not request.user.is_superuser:
                     form_class = cls.AdminAdvisorForm
+                    organization_ids = OrganizationPermissions.for_request(request).organization_ids
                     class UserForm(form_class):
                         def __init__(self, *args, **kwargs):
                             super().__init__(*args, **kwargs)
-                            q = Q(admins=request.user) | Q(advisors=request.user)
                             self.fields["organization"].queryset = (
-                                self.fields["organization"].queryset.filter(q).distinct()
+                                self.fields["organization"].queryset.filter(id__in=organization_ids)
                             )
                     kwargs["form"] = UserForm
                 return super().get_form(request, obj=obj, **kwargs)
@@ -71,20 +104,91 @@ def with_organization_permissions(get_organization=lambda x: x.organization, org
 
 
 
-class AdminAdvisorListFilter(admin.SimpleListFilter):
-    title = _("organization")
-
-    parameter_name = "organization"
+class EstimatedCountPaginator(Paginator):
+    """
+    Uses PostgreSQL's planner estimate (pg_class.reltuples) instead of COUNT(*) for unfiltered
+    changelists of large tables. Filtered querysets and small tables are still counted exactly.
+    """
+
+    threshold = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == "postgresql" and not queryset.query.where and not queryset.query.distinct:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples FROM pg_class WHERE oid = %s::regclass", [queryset.model._meta.db_table]
+                )
+                row = cursor.fetchone()
+            if row and row[0] >= self.threshold:
+                return int(row[0])
+        return queryset.count()
+
+
+class AutocompleteListFilter(admin.SimpleListFilter):
+    """
+    Sidebar filter on a foreign key that searches through the admin's autocomplete view instead of
+    listing every related object. The related model's admin needs search_fields, and the changelist
+    admin needs AutocompleteFilterMixin for the select2 media.
+    """
+
+    template = "admin/autocomplete_filter.html"
+    field_name = None
+
+    def __init__(self, request, params, model, model_admin):
+        self.field = model._meta.get_field(self.field_name)
+        self.parameter_name = self.parameter_name or f"{self.field_name}__id__exact"
+        super().__init__(request, params, model, model_admin)
+        remote = self.field.remote_field.model
+        self.widget = forms.ModelChoiceField(
+            queryset=remote._default_manager.all(),
+            widget=AutocompleteSelect(self.field, model_admin.admin_site),
+            required=False,
+        ).widget
+
+    def has_output(self):
+        return True
 
     def lookups(self, request, model_admin):
-        if request.user.is_superuser:
-            orgs = Organization.objects.all()
-        else:
-            orgs = Organization.objects.filter(Q(admins=request.user) | Q(advisors=request.user)).distinct()
-            return [(org.id, org.name) for org in orgs]
+        # Only the selected object is ever loaded, by the widget.
+        return ()
+
+    def choices(self, changelist):
+        yield {
+            "selected": self.value() is None,
+            "query_string": changelist.get_query_string(remove=[self.parameter_name]),
+            "display": _("All"),
+        }
+
+    def rendered_widget(self):
+        attrs = {"id": f"filter_{self.parameter_name}", "style": "width: 100%"}
+        return self.widget.render(self.parameter_name, self.value(), attrs=attrs)
 
     def queryset(self, request, queryset):
-        return queryset.filter(organization=self.value())
+        if self.value() is None:
+            return queryset
+        return queryset.filter(**{self.field_name: self.value()})
+
+
+class AutocompleteFilterMixin:
+    @property
+    def media(self):
+        media = super().media
+        for list_filter in self.list_filter:
+            if isinstance(list_filter, type) and issubclass(list_filter, AutocompleteListFilter):
+                field = self.model._meta.get_field(list_filter.field_name)
+                media += AutocompleteSelect(field, self.admin_site).media
+        return media
+
+
+class AdminAdvisorListFilter(AutocompleteListFilter):
+    """Organizations are searched through OrganizationAdmin, which only returns the user's own."""
+
+    title = _("organization")
+    field_name = "organization"
+    parameter_name = "organization"
 
 
 
@@ -122,6 +226,8 @@ class UserAdmin(BaseUserAdmin, DynamicArrayMixin):
     list_filter = ("is_staff", "is_superuser", "grad_year")
     search_fields = ("email", "first_name", "last_name")
     ordering = None
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     inlines = (AdvisorOrganizationAdmin, AdminOrganizationAdmin, MembershipAdmin, ExpoPushTokenAdmin)
 
     def has_view_permission(self, request, obj=None):
@@ -141,11 +247,9 @@ class OrganizationAdmin(admin.ModelAdmin, DynamicArrayMixin):
                 "admins",
                 "name",
                 "description",
-                "category",
                 "day",
                 "time",
-                "link",
-                "ical_links",
+                "location",
             )
 
     class AdminForm(forms.ModelForm):
@@ -154,7 +258,6 @@ class OrganizationAdmin(admin.ModelAdmin, DynamicArrayMixin):
                 "admins",
                 "name",
                 "description",
-                "category",
                 "day",
                 "time",
                 "location",
@@ -162,8 +265,25 @@ class OrganizationAdmin(admin.ModelAdmin, DynamicArrayMixin):
 
     list_display = ("name", "type", "day", "time", "location")
     list_filter = ("type", "day")
+    search_fields = ("name",)
     autocomplete_fields = ("advisors", "admins")
     inlines = (InlineLinkAdmin,)
+    actions = ("recompute_class_memberships",)
+
+    @admin.action(description="Recompute class memberships for selected class years")
+    def recompute_class_memberships(self, request, queryset):
+        years = set(queryset.filter(type=OrganizationType.CLASS).values_list("required_grad_year", flat=True))
+        results = Membership.objects.reconcile_grad_years(sorted(years))
+        added = sum(len(a) for a, _ in results.values())
+        removed = sum(len(r) for _, r in results.values())
+        years = ", ".join(map(str, sorted(years)))
+        self.message_user(request, f"Class years {years}: +{added} / -{removed} memberships")
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        if not request.user.is_superuser:
+            actions.pop("recompute_class_memberships", None)
+        return actions
 
     def has_module_permission(self, request):
         return True
@@ -171,7 +291,7 @@ class OrganizationAdmin(admin.ModelAdmin, DynamicArrayMixin):
     def has_view_permission(self, request, obj=None):
         if obj is None or request.user.is_superuser:
             return True
-        return obj.is_admin(request.user) or obj.is_advisor(request.user)
+        return OrganizationPermissions.for_request(request).can_manage(obj.pk)
 
     def has_change_permission(self, request, obj=None):
         return self.has_view_permission(request, obj)
@@ -180,31 +300,43 @@ class OrganizationAdmin(admin.ModelAdmin, DynamicArrayMixin):
         qs = super().get_queryset(request)
         if request.user.is_superuser:
             return qs
-        return qs.filter(Q(admins=request.user) | Q(advisors=request.user)).distinct()
+        return qs.filter(id__in=OrganizationPermissions.for_request(request).organization_ids)
     def get_form(self, request, obj=None, **kwargs):
         if not request.user.is_superuser:
-            kwargs["form"] = self.AdvisorForm if obj.is_advisor(request.user) else self.AdminForm
+            is_advisor = OrganizationPermissions.for_request(request).is_advisor(obj.pk)
+            kwargs["form"] = self.AdvisorForm if is_advisor else self.AdminForm
         return super().get_form(request, obj=obj, **kwargs)
 
 
 @admin.register(Post)
 @with_organization_permissions()
-class PostAdmin(admin.ModelAdmin, DynamicArrayMixin):
+class PostAdmin(AutocompleteFilterMixin, admin.ModelAdmin, DynamicArrayMixin):
     class AdminAdvisorForm(forms.ModelForm):
         class Meta:
             fields = ("organization", "title", "content", "published")
 
-        def __init__(self, user, *args, **kwargs):
-            super().__init__(*args, **kwargs)
-            q = Q(admins=user) | Q(advisors=user)
-            self.fields["organization"].queryset = self.fields["organization"].queryset.filter(q)
-
     date_hierarchy = "date"
     list_display = ("title", "date", "organization", "published")
-    list_filter = ("organization", "published")
+    list_filter = (AdminAdvisorListFilter, "published")
+    list_select_related = ("organization",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_editable = ("published",)
 
 @admin.register(ExpoPushToken)
 class ExpoPushTokenAdmin(admin.ModelAdmin):
-    list_display = ("user", "token")
-    search_fields = ("user__first_name", "user__last_name", "token")
\ No newline at end of file
+    list_display = ("user", "token", "failure_count")
+    search_fields = ("user__first_name", "user__last_name", "token")
+    list_select_related = ("user",)
+    autocomplete_fields = ("user",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+@admin.register(NotificationJob)
+class NotificationJobAdmin(admin.ModelAdmin):
+    list_display = ("post", "status", "attempts", "created", "sent_at")
+    list_filter = ("status",)
+    list_select_related = ("post",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    readonly_fields = ("created", "sent_at", "locked_at", "error")
@@ -0,0 +1,106 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import router
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt import serializers
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from core.cache import claims_checked, remember_claims
+
+# User fields carried in access tokens: what permissions and the post feed need.
+CLAIM_FIELDS = ("type", "grad_year", "is_staff", "is_superuser")
+VERSION_CLAIM = "claims_version"
+
+
+def claims_version(user):
+    # is_active isn't a claim (only active users get tokens), but deactivating a user must change the version.
+    # JSON, like the token itself, so a choices enum and the int loaded from the database hash the same.
+    values = json.dumps([*(getattr(user, field) for field in CLAIM_FIELDS), user.is_active])
+    return hashlib.sha256(values.encode()).hexdigest()[:16]
+
+
+def user_claims(user):
+    claims = {field: getattr(user, field) for field in CLAIM_FIELDS}
+    claims[VERSION_CLAIM] = claims_version(user)
+    return claims
+
+
+def claims_user(token):
+    """
+    A User with only the token's fields loaded; the rest of the row loads on first access. It can't be
+    saved, since the token's values may be out of date.
+    """
+    User = get_user_model()
+    values = {field: token[field] for field in CLAIM_FIELDS}
+    values.update({User._meta.pk.attname: token[api_settings.USER_ID_CLAIM], "is_active": True})
+    fields = [f.attname for f in User._meta.concrete_fields if f.attname in values]
+    user = User.from_db(router.db_for_read(User), fields, [values[field] for field in fields])
+    user._claims_only = True
+    return user
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """A refresh token whose claims, and those of its access tokens, include user_claims()."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.payload.update(user_claims(user))
+        return token
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Builds request.user from the access token's claims instead of loading the row, once this
+    process has seen the same claims in the database within JWT_CLAIMS_CHECK_TTL seconds. Tokens
+    without claims, changed claims, expired checks and unsafe methods take the regular path, which
+    loads the user, rejects inactive or deleted users, and records the check.
+    """
+
+    def authenticate(self, request):
+        # A write may save request.user, which must then be the current row rather than the token's copy.
+        self.use_claims = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        ttl = settings.JWT_CLAIMS_CHECK_TTL
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if ttl and self.use_claims and claims_checked(user_id, validated_token.get(VERSION_CLAIM)):
+            return claims_user(validated_token)
+        user = super().get_user(validated_token)
+        if ttl:
+            remember_claims(user.pk, claims_version(user), ttl)
+        return user
+
+
+class TokenObtainPairSerializer(serializers.TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        return ClaimsRefreshToken.for_user(user)
+
+
+class TokenRefreshSerializer(serializers.TokenRefreshSerializer):
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        # The refresh token holds the claims from sign-in; the new access token gets current ones.
+        access = AccessToken(data["access"])
+        User = get_user_model()
+        user = User.objects.filter(pk=access[api_settings.USER_ID_CLAIM], is_active=True).first()
+        if user is not None:
+            access.payload.update(user_claims(user))
+            data["access"] = str(access)
+        return data
+
+
+class TokenStrategy:
+    """djoser's JWT strategy for social sign-in (SOCIAL_AUTH_TOKEN_STRATEGY), with claims."""
+
+    @classmethod
+    def obtain(cls, user):
+        refresh = ClaimsRefreshToken.for_user(user)
+        return {"access": str(refresh.access_token), "refresh": str(refresh), "user": user}
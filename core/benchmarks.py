@@ -0,0 +1,65 @@
+"""
+Helpers shared by the bench_* management commands. They measure the data seeded by
+`manage.py seed_school` rather than seeding their own.
+"""
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client, RequestFactory
+
+from core.management.commands.seed_school import EMAIL_DOMAIN
+from core.models import User, UserType
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def seeded_student(email=None):
+    """The user with ``email``, or the seeded student in the most orgs, for the longest lists and feed."""
+    users = User.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}", type=UserType.STUDENT)
+    if email:
+        users = User.objects.filter(email=email)
+    user = users.annotate(orgs=Count("memberships")).order_by("-orgs", "pk").first()
+    if user is None:
+        raise CommandError(
+            f"No user {email}." if email else "No seeded data; run `manage.py seed_school` first."
+        )
+    return user
+
+
+def logged_in_client(user):
+    client = Client()
+    client.force_login(user)
+    return client
+
+
+class InProcess:
+    """
+    Requests through the WSGI handler, so connections are opened and closed around each request the
+    way they are behind a real server (the test client skips that).
+    """
+
+    def __init__(self):
+        self.handler = WSGIHandler()
+        self.factory = RequestFactory()
+
+    def get(self, url, headers):
+        """The response's status code and the number of queries it took."""
+        queries = []
+
+        def record(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        environ = self.factory.get(
+            url, **{f"HTTP_{name.upper().replace('-', '_')}": value for name, value in headers.items()}
+        ).environ
+        with connection.execute_wrapper(record):
+            response = self.handler(environ, lambda status, headers: None)
+            # What the WSGI server does when the response is sent; fires request_finished.
+            response.close()
+        return response.status_code, len(queries)
@@ -0,0 +1,57 @@
+from django.db import connections, router
+
+
+def bulk_update_values(model, objs, fields, using=None):
+    """
+    Like ``QuerySet.bulk_update()``, but as a single UPDATE ... FROM a VALUES list. bulk_update builds
+    a CASE expression per field and row, which dominated the time of re-importing a few thousand rows.
+    Sends no signals.
+    """
+    if not objs or not fields:
+        return
+    using = using or router.db_for_write(model)
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    pk = model._meta.pk
+    columns = [model._meta.get_field(field) for field in fields]
+    names = ", ".join(qn(f.column) for f in columns)
+    assignments = ", ".join(
+        f"{qn(f.column)} = CAST(v.{qn(f.column)} AS {f.db_type(connection)})" for f in columns
+    )
+    row = f"({', '.join(['%s'] * (len(columns) + 1))})"
+    params = []
+    for obj in objs:
+        params.append(obj.pk)
+        params.extend(f.get_db_prep_save(getattr(obj, f.attname), connection) for f in columns)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH v (pk, {names}) AS (VALUES {', '.join([row] * len(objs))}) "
+            f"UPDATE {table} SET {assignments} FROM v "
+            f"WHERE {table}.{qn(pk.column)} = CAST(v.pk AS {pk.rel_db_type(connection)})",
+            params,
+        )
+
+
+def bulk_insert_values(model, fields, rows, using=None):
+    """
+    INSERT plain value tuples for ``fields`` without building model instances, which is most of
+    the time ``bulk_create()`` spends on simple rows such as m2m through rows. The values go as one
+    array per column to a single INSERT ... SELECT FROM unnest(), however many rows. Sends no signals.
+    """
+    using = using or router.db_for_write(model)
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    columns = [model._meta.get_field(field) for field in fields]
+    rows = list(rows)
+    if not rows:
+        return
+    names = ", ".join(qn(f.column) for f in columns)
+    arrays = ", ".join(f"%s::{f.db_type(connection)}[]" for f in columns)
+    params = [
+        [f.get_db_prep_save(value, connection) for value in values] for f, values in zip(columns, zip(*rows))
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {qn(model._meta.db_table)} ({names}) SELECT * FROM unnest({arrays})", params
+        )
@@ -0,0 +1,189 @@
+import hashlib
+import pickle
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.http import HttpResponse
+
+ORG_DIRECTORY_VERSION_KEY = "orgs:version"
+ORG_DIRECTORY_MODIFIED_KEY = "orgs:modified"
+
+
+class RedisCache(BaseCache):
+    """Minimal cache backend for any server speaking the Redis protocol. Requires the ``redis`` package."""
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        self._server = server
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import redis
+
+            self._client = redis.Redis.from_url(self._server)
+        return self._client
+
+    def _timeout(self, timeout):
+        if timeout == DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        return None if timeout is None else max(int(timeout), 0)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._timeout(timeout)
+        if timeout == 0:
+            return False
+        return bool(self.client.set(self._key(key, version), pickle.dumps(value), ex=timeout, nx=True))
+
+    def get(self, key, default=None, version=None):
+        value = self.client.get(self._key(key, version))
+        return default if value is None else pickle.loads(value)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._timeout(timeout)
+        if timeout == 0:
+            self.delete(key, version=version)
+        else:
+            self.client.set(self._key(key, version), pickle.dumps(value), ex=timeout)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._timeout(timeout)
+        key = self._key(key, version)
+        if timeout is None:
+            return bool(self.client.persist(key))
+        return bool(self.client.expire(key, timeout))
+
+    def delete(self, key, version=None):
+        return bool(self.client.delete(self._key(key, version)))
+
+    def incr(self, key, delta=1, version=None):
+        import redis
+
+        # Counters are stored pickled like every other value, so increment with a read-modify-write.
+        key = self._key(key, version)
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    value = pipe.get(key)
+                    if value is None:
+                        raise ValueError("Key '%s' not found" % key)
+                    value = pickle.loads(value) + delta
+                    pipe.multi()
+                    pipe.set(key, pickle.dumps(value), keepttl=True)
+                    pipe.execute()
+                    return value
+                except redis.WatchError:
+                    continue
+
+    def clear(self):
+        for key in self.client.scan_iter(match=f"{self.key_prefix}*"):
+            self.client.delete(key)
+
+
+# JWT claims versions this process has checked against the database, by user id: (version, expiry).
+# See core.authentication.ClaimsJWTAuthentication.
+_checked_claims = {}
+CHECKED_CLAIMS_MAX_ENTRIES = 10000
+
+
+def claims_checked(user_id, version):
+    entry = _checked_claims.get(user_id)
+    return version is not None and entry is not None and entry[0] == version and entry[1] > time.monotonic()
+
+
+def remember_claims(user_id, version, ttl):
+    if len(_checked_claims) >= CHECKED_CLAIMS_MAX_ENTRIES:
+        _checked_claims.clear()
+    _checked_claims[user_id] = (version, time.monotonic() + ttl)
+
+
+def forget_claims(user_id):
+    _checked_claims.pop(user_id, None)
+
+
+def get_org_cache():
+    return caches[settings.ORG_CACHE_ALIAS]
+
+
+def get_org_directory_version():
+    cache = get_org_cache()
+    cache.add(ORG_DIRECTORY_VERSION_KEY, 1, None)
+    return cache.get(ORG_DIRECTORY_VERSION_KEY, 1)
+
+
+def get_org_directory_last_modified():
+    return get_org_cache().get(ORG_DIRECTORY_MODIFIED_KEY)
+
+
+def bump_org_directory_version():
+    cache = get_org_cache()
+    cache.set(ORG_DIRECTORY_MODIFIED_KEY, int(time.time()), None)
+    try:
+        return cache.incr(ORG_DIRECTORY_VERSION_KEY)
+    except ValueError:
+        cache.add(ORG_DIRECTORY_VERSION_KEY, 1, None)
+        return cache.incr(ORG_DIRECTORY_VERSION_KEY)
+
+
+class OrgDirectoryCacheMixin:
+    """
+    Caches rendered list/retrieve responses for a viewset whose output only depends on the
+    org directory. Keys include the directory version, so bumping it invalidates every entry.
+    Requests carrying any of ``uncached_params`` depend on more than the directory and skip the cache.
+    """
+
+    uncached_params = ()
+
+    def is_cacheable(self):
+        return not any(p in self.request.query_params for p in self.uncached_params)
+
+    def get_cache_key(self):
+        request = self.request
+        parts = (
+            self.basename,
+            self.action,
+            self.kwargs.get(self.lookup_url_kwarg or self.lookup_field, ""),
+            request.scheme,
+            request.get_host(),
+            request.accepted_renderer.format,
+            sorted(request.query_params.lists()),
+        )
+        digest = hashlib.md5(repr(parts).encode()).hexdigest()
+        return f"orgs:{get_org_directory_version()}:{digest}"
+
+    def cached_response(self, handler, *args, **kwargs):
+        renderer = self.request.accepted_renderer
+        if renderer.format != "json" or not self.is_cacheable() or not settings.ORG_CACHE_TIMEOUT:
+            return handler(*args, **kwargs)
+
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f"{content_type}; charset={renderer.charset}"
+
+        cache = get_org_cache()
+        key = self.get_cache_key()
+        content = cache.get(key)
+        if content is None:
+            response = handler(*args, **kwargs)
+            if response.status_code != 200:
+                return response
+            content = renderer.render(
+                response.data, self.request.accepted_media_type, self.get_renderer_context()
+            )
+            cache.set(key, content, settings.ORG_CACHE_TIMEOUT)
+        return HttpResponse(content, content_type=content_type)
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,101 @@
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.authentication import ClaimsRefreshToken
+from core.benchmarks import InProcess, percentile, seeded_student
+from core.postgresql.base import close_pools
+from fremont_app.settings import connection_options
+
+
+def measure(target, url, headers, requests):
+    """Latencies of ``requests`` requests, and the time each new connection took, in this thread."""
+    connects = []
+    connect = connection.connect
+
+    def timed_connect():
+        start = time.perf_counter()
+        connect()
+        connects.append(time.perf_counter() - start)
+
+    latencies = []
+    connection.connect = timed_connect
+    try:
+        for _ in range(requests):
+            start = time.perf_counter()
+            status, _ = target.get(url, headers)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                raise CommandError(f"{url} returned {status}")
+    finally:
+        del connection.connect
+        connection.close()
+    return latencies, connects
+
+
+class Command(BaseCommand):
+    help = (
+        "Per-request latency with each DB_CONN_MODE on the seed_school data. Requests go through the WSGI "
+        "handler, from --threads threads at once. Reports p50/p95 latency, and how often and for how long "
+        "requests waited on a new connection (in pool mode, including the wait for a free one)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="/api/users/me/tokens/")
+        parser.add_argument("--requests", type=int, default=500, help="Requests per mode and thread.")
+        parser.add_argument("--threads", type=int, default=1)
+        parser.add_argument(
+            "--modes",
+            default="request,persistent,pool",
+            help="Comma-separated DB_CONN_MODEs. pgbouncer only differs from persistent behind PgBouncer.",
+        )
+        parser.add_argument("--email", help="User to make the requests as.")
+
+    def handle(self, *args, url, requests, threads, modes, email, **options):
+        headers = {
+            "Authorization": f"Bearer {ClaimsRefreshToken.for_user(seeded_student(email)).access_token}"
+        }
+        connection.close()
+        target = InProcess()
+        defaults = {key: connection.settings_dict.get(key) for key in ("CONN_MAX_AGE", "CONN_HEALTH_CHECKS")}
+
+        self.stdout.write(f"{url}, {requests} requests per mode and thread, {threads} threads")
+        self.stdout.write(f"{'mode':<12} {'p50 ms':>8} {'p95 ms':>8} {'connects':>9} {'connect ms':>11}")
+        for mode in modes.split(","):
+            # Each thread has its own connection object, but they all share settings_dict.
+            connection.settings_dict.pop("POOL", None)
+            connection.settings_dict.update(defaults)
+            connection.settings_dict.update(connection_options(mode))
+            # Warm up: imports, caches and the claims check shouldn't count against the first mode.
+            measure(target, url, headers, 5)
+            latencies, connects, errors = self.run_threads(target, url, headers, requests, threads)
+            if errors:
+                raise CommandError(f"{mode}: {errors[0]!r}")
+            connect_ms = statistics.mean(connects) * 1000 if connects else 0
+            self.stdout.write(
+                f"{mode:<12} {percentile(latencies, 0.5) * 1000:>8.2f} "
+                f"{percentile(latencies, 0.95) * 1000:>8.2f} {len(connects):>9} {connect_ms:>11.2f}"
+            )
+            close_pools()
+
+    def run_threads(self, target, url, headers, requests, threads):
+        latencies, connects, errors = [], [], []
+
+        def run():
+            try:
+                thread_latencies, thread_connects = measure(target, url, headers, requests)
+            except Exception as e:
+                errors.append(e)
+            else:
+                latencies.extend(thread_latencies)
+                connects.extend(thread_connects)
+
+        workers = [threading.Thread(target=run) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return latencies, connects, errors
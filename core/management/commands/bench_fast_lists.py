@@ -0,0 +1,51 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks import logged_in_client, seeded_student
+from core.cache import get_org_cache
+
+ENDPOINTS = {
+    "posts": "/api/posts/",
+    "posts (keyset)": "/api/posts/?cursor=",
+    "orgs": "/api/orgs/",
+    "memberships": "/api/users/me/orgs/",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Requests/sec on the post, org and membership lists with the regular serializers and with "
+        "FAST_LIST_SERIALIZATION, on the seed_school data. The org cache is cleared before every request."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seconds", type=float, default=3, help="Time spent on each endpoint and mode.")
+        parser.add_argument("--email", help="User to make the requests as (default: the busiest student).")
+
+    def handle(self, *args, seconds, email, **options):
+        user = seeded_student(email)
+        client = logged_in_client(user)
+
+        self.stdout.write(f"{user.email}, in {user.orgs} orgs")
+        self.stdout.write(f"{'endpoint':<22} {'regular req/s':>14} {'fast req/s':>11} {'speedup':>8}")
+        for label, url in ENDPOINTS.items():
+            results = []
+            for fast in (False, True):
+                settings.FAST_LIST_SERIALIZATION = fast
+                client.get(url)
+                results.append(self.measure(client, url, seconds))
+            regular, fast = results
+            self.stdout.write(f"{label:<22} {regular:>14.1f} {fast:>11.1f} {fast / regular:>7.2f}x")
+
+    def measure(self, client, url, seconds):
+        done = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            get_org_cache().clear()
+            response = client.get(url)
+            if response.status_code != 200:
+                raise CommandError(f"{url} returned {response.status_code}")
+            done += 1
+        return done / (time.perf_counter() - start)
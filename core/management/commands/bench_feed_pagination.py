@@ -0,0 +1,62 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks import logged_in_client, seeded_student
+from core.models import Membership, Post
+from core.views import KeysetPages
+
+
+def measure(client, url, repeat, warmup):
+    for _ in range(warmup):
+        client.get(url)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url)
+        timings.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            raise CommandError(f"{url} returned {response.status_code}")
+    return statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare /api/posts/ latency across page depth for page-number and keyset pagination, on the "
+        "seed_school data as the seeded student in the most orgs. OFFSET only starts to hurt tens of "
+        "thousands of posts into a feed; seed enough of them, e.g. `seed_school --posts 300000`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--depths", type=int, nargs="+", default=[1, 10, 100, 500, 1000, 2000])
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--warmup", type=int, default=2, help="Unmeasured requests per page.")
+        parser.add_argument("--email", help="User whose feed to page through.")
+
+    def handle(self, *args, depths, repeat, warmup, email, **options):
+        user = seeded_student(email)
+        client = logged_in_client(user)
+
+        paginator = KeysetPages()
+        paginator.base_url = "/api/posts/"
+        # The same rows as PostViewSet's feed.
+        orgs = Membership.objects.filter(user=user).values("organization_id")
+        posts = Post.objects.filter(published=True, organization__in=orgs).order_by("-date", "-pk")
+        total = posts.count()
+
+        self.stdout.write(f"{total} posts in the feed, {-(-total // paginator.page_size)} pages")
+        self.stdout.write(f"{'page':>6} {'page-number ms':>15} {'keyset ms':>10}")
+        for depth in depths:
+            offset = (depth - 1) * paginator.page_size
+            if offset >= total:
+                self.stdout.write(f"The feed has no page {depth}; seed more posts to go deeper.")
+                break
+            cursor_url = (
+                "/api/posts/?cursor="
+                if depth == 1
+                else paginator.encode_cursor(posts[offset - 1], reverse=False)
+            )
+            page_ms = measure(client, f"/api/posts/?page={depth}", repeat, warmup)
+            keyset_ms = measure(client, cursor_url, repeat, warmup)
+            self.stdout.write(f"{depth:>6} {page_ms:>15.2f} {keyset_ms:>10.2f}")
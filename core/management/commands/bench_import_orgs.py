@@ -0,0 +1,81 @@
+import csv
+import io
+import os
+import tempfile
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.management.commands.seed_school import EMAIL_DOMAIN
+from core.models import DayOfWeek, Organization, User, UserType
+
+PREFIX = "Benchmark Import"
+
+
+def write_csv(path, rows, revision, emails):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Club", "Description", "Advisors", "Admins", "Links", "Day", "Time", "Location"])
+        for i in range(rows):
+            writer.writerow(
+                [
+                    f"{PREFIX} {i}",
+                    f"Revision {revision} of club {i}",
+                    emails[i % len(emails)],
+                    f"{emails[(i + 1) % len(emails)]};{emails[(i + 2) % len(emails)]}",
+                    f"Website|https://example.com/{i};Instagram|https://instagram.com/club{i}",
+                    DayOfWeek.labels[i % 7],
+                    "Lunch",
+                    f"Room {i % 300}",
+                ]
+            )
+
+
+def run(path, batch_size):
+    out = io.StringIO()
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        call_command("import_orgs", path, batch_size=batch_size, stdout=out, stderr=out)
+        elapsed = time.perf_counter() - start
+    return elapsed, len(queries), out.getvalue().strip().splitlines()[-1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time `manage.py import_orgs` on a generated CSV naming seed_school staff, once creating every "
+        "club and once updating them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=5000)
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--budget", type=float, default=None, help="Fail if a pass takes longer (seconds)."
+        )
+        parser.add_argument("--keep", action="store_true", help="Keep the imported clubs afterwards.")
+
+    def handle(self, *args, rows, batch_size, budget, keep, **options):
+        staff = User.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}", type=UserType.STAFF)
+        emails = list(staff.order_by("pk").values_list("email", flat=True)[:10])
+        if not emails:
+            raise CommandError("No seeded data; run `manage.py seed_school` first.")
+        Organization.objects.filter(name__startswith=PREFIX).delete()
+
+        failed = False
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "clubs.csv")
+            try:
+                for label, revision in (("create", 1), ("update", 2)):
+                    write_csv(path, rows, revision, emails)
+                    elapsed, queries, summary = run(path, batch_size)
+                    self.stdout.write(f"{label:>6}: {elapsed:.3f}s, {queries} queries ({summary})")
+                    failed |= budget is not None and elapsed > budget
+            finally:
+                if not keep:
+                    Organization.objects.filter(name__startswith=PREFIX).delete()
+
+        if failed:
+            raise CommandError(f"Import took longer than {budget}s")
@@ -0,0 +1,66 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.authentication import ClaimsRefreshToken
+from core.benchmarks import seeded_student
+
+
+def count_queries(client, url, headers):
+    queries = []
+
+    def record(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(record):
+        client.get(url, **headers)
+    return len(queries)
+
+
+class Command(BaseCommand):
+    help = (
+        "Authenticated request throughput on the seed_school data with a plain access token (user loaded "
+        "on every request) and with a claims token (user built from the token once the claims have been "
+        "checked). The connection is kept open between requests unless --reconnect is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="/api/posts/")
+        parser.add_argument("--seconds", type=float, default=3, help="Time spent on each mode.")
+        parser.add_argument("--reconnect", action="store_true", help="Open a new connection per request.")
+        parser.add_argument("--email", help="User to make the requests as.")
+
+    def handle(self, *args, url, seconds, reconnect, email, **options):
+        if not reconnect:
+            connection.close()
+            connection.settings_dict["CONN_MAX_AGE"] = None
+        user = seeded_student(email)
+        client = Client()
+        modes = (
+            ("plain token", RefreshToken.for_user(user).access_token, 60),
+            ("claims token, TTL 0", ClaimsRefreshToken.for_user(user).access_token, 0),
+            ("claims token, TTL 60", ClaimsRefreshToken.for_user(user).access_token, 60),
+        )
+
+        self.stdout.write(url)
+        self.stdout.write(f"{'mode':<22} {'req/s':>8} {'queries':>8}")
+        for label, token, ttl in modes:
+            settings.JWT_CLAIMS_CHECK_TTL = ttl
+            headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+            # Warm up, which also performs the claims check.
+            client.get(url, **headers)
+            queries = count_queries(client, url, headers)
+            done = 0
+            start = time.perf_counter()
+            while time.perf_counter() - start < seconds:
+                response = client.get(url, **headers)
+                if response.status_code != 200:
+                    raise CommandError(f"{url} returned {response.status_code}")
+                done += 1
+            rate = done / (time.perf_counter() - start)
+            self.stdout.write(f"{label:<22} {rate:>8.1f} {queries:>8}")
@@ -0,0 +1,49 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from core import notifications
+from core.models import Post
+
+PARAGRAPH = (
+    "## Meeting notes\n\n"
+    "Thanks to everyone who came out on **Thursday**! A few reminders:\n\n"
+    "- Dues are due by [the end of the month](https://example.com/dues)\n"
+    "- Bring a *signed* permission slip for the field trip\n"
+    "- `Room 204` is booked for the rest of the semester\n\n"
+    "> See you next week, and check the club page for updates.\n\n"
+)
+
+
+def best(stmt, number, repeat):
+    return min(timeit.repeat(stmt, number=number, repeat=repeat)) / number * 1e6
+
+
+class Command(BaseCommand):
+    help = "Compare the per-send cost of parsing a post's markdown against reusing its cached renderings."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size", type=int, default=2000, help="Approximate content length in characters."
+        )
+        parser.add_argument("--number", type=int, default=2000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, size, number, repeat, **options):
+        content = (PARAGRAPH * (size // len(PARAGRAPH) + 1))[:size]
+        post = Post(title="Benchmark", content=content)
+        post.render_content()
+
+        # What NotificationJob.dispatch did before: parse the first 300 characters on every send.
+        parse_us = best(lambda: notifications.markdown_to_text(post.content[:300]), number, repeat)
+        # What it does now: a hash check, then the stored excerpt.
+        cached_us = best(lambda: (post.render_content(), post.content_excerpt), number, repeat)
+        # Rendering the whole post once, as the pre_save signal does when the content changes.
+        save_us = best(lambda: Post(content=content).render_content(), max(number // 10, 1), repeat)
+
+        self.stdout.write(f"{len(content)} characters of markdown")
+        self.stdout.write(f"{'per-send parse':<22} {parse_us:>10.1f} us")
+        self.stdout.write(
+            f"{'per-send cached':<22} {cached_us:>10.1f} us  ({parse_us / cached_us:.0f}x faster)"
+        )
+        self.stdout.write(f"{'render on save':<22} {save_us:>10.1f} us  (once per content change)")
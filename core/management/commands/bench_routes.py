@@ -0,0 +1,180 @@
+import json
+import os
+import re
+import subprocess
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from core.authentication import ClaimsRefreshToken
+from core.benchmarks import InProcess, percentile, seeded_student
+from core.management.commands.seed_school import ADMIN_EMAIL
+from core.models import Organization, Post, User
+
+ROUTES = {
+    "posts": ("student", "/api/posts/"),
+    "posts (keyset)": ("student", "/api/posts/?cursor="),
+    "posts (summary)": ("student", "/api/posts/?view=summary"),
+    "orgs": ("student", "/api/orgs/"),
+    "users/me": ("student", "/api/users/me/"),
+    "users/me/orgs": ("student", "/api/users/me/orgs/"),
+    "admin users": ("admin", "/admin/core/user/"),
+    "admin orgs": ("admin", "/admin/core/organization/"),
+    "admin posts": ("admin", "/admin/core/post/"),
+    "admin tokens": ("admin", "/admin/core/expopushtoken/"),
+}
+SETTINGS = (
+    "FAST_LIST_SERIALIZATION",
+    "POST_FEED_MATERIALIZED",
+    "DB_CONN_MODE",
+    "JWT_CLAIMS_CHECK_TTL",
+    "LAZY_ADMIN",
+    "REQUEST_PROFILING",
+)
+SERVER_TIMING_QUERIES = re.compile(r'queries;desc="(\d+) queries')
+
+
+class Server:
+    def __init__(self, url):
+        self.url = url.rstrip("/")
+
+    def get(self, url, headers):
+        try:
+            with urllib.request.urlopen(urllib.request.Request(self.url + url, headers=headers)) as response:
+                response.read()
+                match = SERVER_TIMING_QUERIES.search(response.headers.get("Server-Timing", ""))
+                return response.status, int(match[1]) if match else None
+        except urllib.error.HTTPError as e:
+            return e.code, None
+
+
+def credentials(email):
+    student = seeded_student(email)
+    admin = User.objects.filter(email=ADMIN_EMAIL).first()
+    if admin is None:
+        raise CommandError("No seeded data; run `manage.py seed_school` first.")
+    client = Client()
+    client.force_login(admin)
+    return {
+        "student": {"Authorization": f"Bearer {ClaimsRefreshToken.for_user(student).access_token}"},
+        "admin": {
+            "Cookie": f"{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}"
+        },
+    }
+
+
+def measure(target, url, headers, requests, warmup):
+    for _ in range(warmup):
+        target.get(url, headers)
+    latencies, queries = [], []
+    start = time.perf_counter()
+    for _ in range(requests):
+        request_start = time.perf_counter()
+        status, count = target.get(url, headers)
+        latencies.append((time.perf_counter() - request_start) * 1000)
+        if status != 200:
+            raise CommandError(f"{url} returned {status}")
+        if count is not None:
+            queries.append(count)
+    elapsed = time.perf_counter() - start
+    return {
+        "url": url,
+        "requests": requests,
+        "p50": percentile(latencies, 0.5),
+        "p90": percentile(latencies, 0.9),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "mean": sum(latencies) / len(latencies),
+        "rps": requests / elapsed,
+        "queries": percentile(queries, 0.5) if queries else None,
+        "max_queries": max(queries) if queries else None,
+    }
+
+
+def commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Latency percentiles, queries per request and throughput of the main API routes (as the seeded "
+        "student in the most orgs) and the admin changelists (as the seeded admin), on the seed_school "
+        "data. Requests go through the WSGI handler in-process, or to a running server with --server, "
+        "which reports queries only with REQUEST_PROFILING on (for the student's routes, with DEBUG on "
+        "too). Each run is saved as JSON; --compare prints the change from an earlier one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--server", help="Base URL of a running server (default: in-process).")
+        parser.add_argument("--requests", type=int, default=100, help="Measured requests per route.")
+        parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests per route.")
+        parser.add_argument("--routes", help=f"Comma-separated subset of: {', '.join(ROUTES)}.")
+        parser.add_argument("--email", help="Student to make the API requests as.")
+        parser.add_argument("--output", help="Where to save the results (default: benchmarks/<time>.json).")
+        parser.add_argument("--compare", help="Earlier results to compare with.")
+
+    def handle(self, *args, server, requests, warmup, routes, email, output, compare, **options):
+        routes = routes.split(",") if routes else list(ROUTES)
+        unknown = set(routes) - set(ROUTES)
+        if unknown:
+            raise CommandError(f"Unknown routes: {', '.join(sorted(unknown))}")
+        headers = credentials(email)
+        target = Server(server) if server else InProcess()
+
+        results = {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "commit": commit(),
+            "target": server or "in-process",
+            "settings": {name: getattr(settings, name, None) for name in SETTINGS},
+            "dataset": {
+                "users": User.objects.count(),
+                "orgs": Organization.objects.count(),
+                "posts": Post.objects.count(),
+            },
+            "routes": {},
+        }
+        for label in routes:
+            user, url = ROUTES[label]
+            results["routes"][label] = measure(target, url, headers[user], requests, warmup)
+
+        previous = None
+        if compare:
+            with open(compare) as f:
+                previous = json.load(f)
+        self.print_results(results, previous)
+
+        output = output or os.path.join(
+            settings.BASE_DIR, "benchmarks", f"{datetime.now().strftime('%Y-%m-%dT%H%M%S')}.json"
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+        self.stdout.write(f"Saved {output}")
+
+    def print_results(self, results, previous=None):
+        header = f"{'route':<18} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'queries':>8}"
+        self.stdout.write(header + ("  vs previous p50 / req/s" if previous else ""))
+        for label, row in results["routes"].items():
+            queries = "-" if row["queries"] is None else row["queries"]
+            line = (
+                f"{label:<18} {row['p50']:>8.2f} {row['p95']:>8.2f} {row['p99']:>8.2f} "
+                f"{row['rps']:>8.1f} {queries:>8}"
+            )
+            old = (previous or {}).get("routes", {}).get(label)
+            if old:
+                line += f"  {row['p50'] / old['p50'] - 1:>+7.1%} / {row['rps'] / old['rps'] - 1:>+7.1%}"
+            self.stdout.write(line)
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.benchmarks import logged_in_client, percentile, seeded_student
+from core.models import Post
+
+DEFAULT_QUERIES = [
+    "robotics",
+    "meeting",
+    '"permission slip"',
+    "forms -deadline",
+    "volunteer or tickets",
+    "zebra",
+]
+
+
+class Command(BaseCommand):
+    help = "Measure /api/search/ latency on the seed_school data, as the seeded student in the most orgs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("queries", nargs="*", default=DEFAULT_QUERIES)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--email", help="User to search as.")
+
+    def handle(self, *args, queries, repeat, email, **options):
+        user = seeded_student(email)
+        client = logged_in_client(user)
+
+        self.stdout.write(f"{Post.objects.count()} posts, user in {user.organizations.count()} organizations")
+        self.stdout.write(
+            f"{'query':>24} {'orgs':>5} {'posts':>6} {'p50 ms':>8} {'p95 ms':>8} {'db p50 ms':>10}"
+        )
+        for query in queries:
+            timings, db_timings = [], []
+            for _ in range(repeat):
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    response = client.get("/api/search/", {"q": query})
+                    timings.append((time.perf_counter() - start) * 1000)
+                if response.status_code != 200:
+                    raise CommandError(f"{query!r} returned {response.status_code}")
+                # Only the search queries themselves, not session and user lookups.
+                db_timings.append(sum(float(q["time"]) for q in captured if "ts_rank" in q["sql"]) * 1000)
+            data = response.json()
+            self.stdout.write(
+                f"{query:>24} {len(data['organizations']):>5} {len(data['posts']):>6} "
+                f"{percentile(timings, 0.5):>8.2f} {percentile(timings, 0.95):>8.2f} "
+                f"{percentile(db_timings, 0.5):>10.2f}"
+            )
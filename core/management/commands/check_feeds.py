@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Exists, OuterRef
+
+from core.models import FeedEntry, User
+
+
+class Command(BaseCommand):
+    help = "Check materialized post feeds against memberships and published posts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="Rebuild the feeds of affected users.")
+        parser.add_argument("--sample", type=int, default=10, help="Inconsistent rows to list per kind.")
+
+    def handle(self, *args, fix, sample, **options):
+        if not settings.POST_FEED_MATERIALIZED:
+            raise CommandError("POST_FEED_MATERIALIZED is off, so there are no feeds to check.")
+
+        missing, extra, stale = FeedEntry.objects.diff()
+        counts = {"missing": missing.count(), "extra": extra.count(), "stale": stale.count()}
+        self.stdout.write("Missing: {missing}, extra: {extra}, stale: {stale}".format(**counts))
+        if not any(counts.values()):
+            return
+
+        samples = {
+            "missing": missing[:sample],
+            "extra": extra.values_list("user_id", "post_id")[:sample],
+            "stale": stale.values_list("user_id", "post_id")[:sample],
+        }
+        for kind, rows in samples.items():
+            if counts[kind] and sample > 0:
+                pairs = ", ".join(f"({user_id}, {post_id})" for user_id, post_id in rows)
+                self.stdout.write(f"  {kind} (user, post): {pairs}{', ...' if counts[kind] > sample else ''}")
+
+        users = User.objects.filter(
+            Exists(missing.filter(user_id=OuterRef("pk")))
+            | Exists(extra.filter(user_id=OuterRef("pk")))
+            | Exists(stale.filter(user_id=OuterRef("pk")))
+        )
+        users = list(users.values_list("pk", flat=True))
+        if not fix:
+            raise CommandError(
+                f"Feeds of {len(users)} user(s) are inconsistent. Run with --fix to rebuild them."
+            )
+        FeedEntry.objects.rebuild(user_ids=users)
+        self.stdout.write(f"Rebuilt feeds of {len(users)} user(s)")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.models import PushTicket
+
+
+class Command(BaseCommand):
+    help = "Fetch Expo push receipts and prune tokens for devices that are no longer registered."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=None, help="Maximum number of tickets to check.")
+
+    def handle(self, *args, limit, **options):
+        checked = PushTicket.objects.check_receipts(limit=limit)
+        self.stdout.write(f"Checked {checked} receipt(s)")
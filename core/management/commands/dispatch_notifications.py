@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.models import NotificationJob
+
+
+class Command(BaseCommand):
+    help = "Send pending push notification jobs to Expo."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit", type=int, default=None, help="Maximum number of jobs to send per pass."
+        )
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new jobs.")
+        parser.add_argument("--interval", type=float, default=5, help="Seconds between polls with --loop.")
+
+    def handle(self, *args, limit, loop, interval, **options):
+        while True:
+            sent = NotificationJob.objects.dispatch(limit=limit)
+            if sent or options["verbosity"] > 1:
+                self.stdout.write(f"Sent {sent} notification job(s)")
+            if not loop:
+                break
+            time.sleep(interval)
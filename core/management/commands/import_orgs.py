@@ -0,0 +1,224 @@
+import csv
+import time
+from collections import defaultdict
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+from django.core.validators import URLValidator
+from django.db import connection, transaction
+
+from core.bulk import bulk_insert_values, bulk_update_values
+from core.cache import bump_org_directory_version
+from core.models import DayOfWeek, Organization, OrganizationLink, OrganizationType, User
+
+COLUMNS = {
+    "club": "name",
+    "name": "name",
+    "description": "description",
+    "advisors": "advisors",
+    "admins": "admins",
+    "links": "links",
+    "day": "day",
+    "time": "time",
+    "location": "location",
+}
+DAYS = {day.label.lower(): day.value for day in DayOfWeek}
+RELATIONS = ("advisors", "admins", "links")
+
+
+class RowError(Exception):
+    pass
+
+
+def split(value):
+    return [part.strip() for part in value.replace("\n", ";").split(";") if part.strip()]
+
+
+def parse_day(value):
+    if not value:
+        return None
+    value = value.strip().lower()
+    if value.isdigit() and int(value) in DayOfWeek.values:
+        return int(value)
+    if value in DAYS:
+        return DAYS[value]
+    raise RowError(f"Invalid day {value!r}")
+
+
+def parse_links(value):
+    links = []
+    validate = URLValidator()
+    for part in split(value):
+        title, _, url = part.rpartition("|")
+        url = url.strip()
+        try:
+            validate(url)
+        except ValidationError:
+            raise RowError(f"Invalid link {url!r}")
+        links.append((title.strip() or url, url))
+    return links
+
+
+def delete_links(org_ids):
+    # A queryset delete() would send post_delete, and bump the directory version, once per link.
+    org_ids = list(org_ids)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {connection.ops.quote_name(OrganizationLink._meta.db_table)} "
+            f"WHERE organization_id IN ({', '.join(['%s'] * len(org_ids))})",
+            org_ids,
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        "Create or update clubs from a CSV file. Columns: Club (or Name), Description, Advisors, Admins, "
+        "Links, Day, Time, Location. Advisors/admins are emails and links are 'Title|URL', separated by ';'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, path, batch_size, **options):
+        self.created = self.updated = self.unchanged = 0
+        self.errors = []
+        # Line of each club name already imported, so a repeated name is reported instead of overwriting.
+        self.lines = {}
+        # Advisors, admins and links of every imported club, written once per table at the end.
+        self.relations = {relation: {} for relation in RELATIONS}
+        self.new_ids = set()
+        start = time.perf_counter()
+
+        with open(path, encoding="utf-8-sig", newline="") as f, transaction.atomic():
+            reader = csv.DictReader(f)
+            self.columns = {
+                h: COLUMNS[h.strip().lower()] for h in reader.fieldnames if h.strip().lower() in COLUMNS
+            }
+            rows = ((reader.line_num, row) for row in reader)
+            for batch in iter(lambda: list(islice(rows, batch_size)), []):
+                self.import_batch(batch)
+            self.replace_relations()
+
+        bump_org_directory_version()
+        for line, error in self.errors:
+            self.stderr.write(f"Line {line}: {error}")
+        self.stdout.write(
+            f"Created {self.created}, updated {self.updated}, unchanged {self.unchanged}, "
+            f"skipped {len(self.errors)} "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+
+    def parse_row(self, row):
+        data = {field: (row.get(header) or "").strip() for header, field in self.columns.items()}
+        if not data.get("name"):
+            raise RowError("Missing club name")
+        for field in ("name", "time", "location"):
+            if len(data.get(field, "")) > 200:
+                raise RowError(f"{field.capitalize()} is longer than 200 characters")
+        data["day"] = parse_day(data.get("day"))
+        data["links"] = parse_links(data.get("links", ""))
+        data["advisors"] = [email.lower() for email in split(data.get("advisors", ""))]
+        data["admins"] = [email.lower() for email in split(data.get("admins", ""))]
+        return data
+
+    def import_batch(self, batch):
+        parsed = {}
+        for line, row in batch:
+            try:
+                data = self.parse_row(row)
+            except RowError as e:
+                self.errors.append((line, e))
+                continue
+            first = self.lines.setdefault(data["name"], line)
+            if first != line:
+                self.errors.append((line, f"Duplicate club {data['name']!r}, first on line {first}"))
+            else:
+                parsed[data["name"]] = (line, data)
+
+        emails = {email for _, data in parsed.values() for email in data["advisors"] + data["admins"]}
+        users = dict(User.objects.filter(email__in=emails).values_list("email", "id"))
+        for name, (line, data) in list(parsed.items()):
+            unknown = [email for email in data["advisors"] + data["admins"] if email not in users]
+            if unknown:
+                self.errors.append((line, f"Unknown user(s) {', '.join(unknown)}"))
+                del parsed[name]
+
+        existing = {}
+        for org in Organization.objects.filter(name__in=parsed).order_by("-id"):
+            existing[org.name] = org
+
+        fields = [f for f in ("description", "day", "time", "location") if f in self.columns.values()]
+        new, changed, unchanged = [], [], []
+        for name, (_, data) in parsed.items():
+            values = {
+                field: data[field] if data[field] != "" or field == "description" else None
+                for field in fields
+            }
+            org = existing.get(name)
+            if org is None:
+                new.append(Organization(name=name, type=OrganizationType.CLUB, **values))
+            elif any(getattr(org, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(org, field, value)
+                changed.append(org)
+            else:
+                unchanged.append(org)
+
+        Organization.objects.bulk_create(new)
+        if new and new[0].pk is None:
+            # Only PostgreSQL returns primary keys from bulk inserts.
+            ids = dict(
+                Organization.objects.filter(name__in=[org.name for org in new]).values_list("name", "id")
+            )
+            for org in new:
+                org.pk = ids[org.name]
+        bulk_update_values(Organization, changed, fields)
+        self.created += len(new)
+        self.new_ids.update(org.pk for org in new)
+        self.updated += len(changed)
+        self.unchanged += len(unchanged)
+        orgs = {org.name: org for org in new + changed + unchanged}
+
+        # A present but empty column clears the relation; a missing column leaves it alone.
+        for relation, values in self.relations.items():
+            if relation in self.columns.values():
+                for name, (_, data) in parsed.items():
+                    if relation == "links":
+                        values[orgs[name].pk] = data["links"]
+                    else:
+                        values[orgs[name].pk] = [users[email] for email in data[relation]]
+
+    def replace_relations(self):
+        """Rewrite each relation of the clubs whose imported value differs from the stored one."""
+        # Clubs created by this import have nothing stored yet.
+        stored = set().union(*self.relations.values()) - self.new_ids
+
+        for relation in ("advisors", "admins"):
+            through = getattr(Organization, relation).through
+            values = {org: set(users) for org, users in self.relations[relation].items()}
+            current = defaultdict(set)
+            rows = through.objects.filter(organization__in=stored).values_list("organization", "user")
+            for org, user in rows:
+                current[org].add(user)
+            changed = [org for org, users in values.items() if users != current[org]]
+            if any(current[org] for org in changed):
+                through.objects.filter(organization__in=changed).delete()
+            bulk_insert_values(
+                through, ("organization", "user"), ((org, user) for org in changed for user in values[org])
+            )
+
+        values = self.relations["links"]
+        current = defaultdict(list)
+        rows = OrganizationLink.objects.filter(organization__in=stored).order_by("pk")
+        for org, title, url in rows.values_list("organization", "title", "url"):
+            current[org].append((title, url))
+        changed = [org for org, links in values.items() if links != current[org]]
+        if any(current[org] for org in changed):
+            delete_links(changed)
+        bulk_insert_values(
+            OrganizationLink,
+            ("organization", "title", "url"),
+            ((org, title, url) for org in changed for title, url in values[org]),
+        )
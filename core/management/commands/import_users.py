@@ -0,0 +1,190 @@
+import csv
+import json
+import time
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models import Q
+
+from core.bulk import bulk_update_values
+from core.cache import bump_org_directory_version
+from core.models import Membership, Organization, User, UserType
+
+# Column names used by our own exports, Schoology's user export and the district SIS.
+COLUMNS = {
+    "email": "email",
+    "primary_email": "email",
+    "email_address": "email",
+    "first_name": "first_name",
+    "name_first": "first_name",
+    "name_first_preferred": "first_name",
+    "last_name": "last_name",
+    "name_last": "last_name",
+    "type": "type",
+    "role": "type",
+    "grad_year": "grad_year",
+    "graduation_year": "grad_year",
+    "class_of": "grad_year",
+}
+FIELDS = ("first_name", "last_name", "type", "grad_year")
+TYPES = {t.label.lower(): t.value for t in UserType}
+DIRECTORY_FIELDS = {"first_name", "last_name", "type"}
+
+
+class RowError(Exception):
+    pass
+
+
+def normalize(header):
+    return header.strip().lower().replace(" ", "_").replace("-", "_")
+
+
+def parse_type(value):
+    value = value.lower()
+    if value.isdigit() and int(value) in UserType.values:
+        return int(value)
+    if value in TYPES:
+        return TYPES[value]
+    raise RowError(f"Invalid type {value!r}")
+
+
+def read_csv(f):
+    reader = csv.DictReader(f)
+    for row in reader:
+        yield f"Line {reader.line_num}", row
+
+
+def read_json(f):
+    data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("users", data.get("user"))
+    if not isinstance(data, list):
+        raise CommandError("Expected a JSON list of users, or an object with a 'users' list.")
+    for i, row in enumerate(data, 1):
+        yield f"Record {i}", row
+
+
+class Command(BaseCommand):
+    help = (
+        "Create or update users from a roster export (CSV or JSON) and reconcile their required "
+        "memberships. Columns: email, first_name, last_name, type, grad_year (Schoology names are "
+        "accepted too). Columns missing from the file are left alone on existing users."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=("csv", "json"), help="Defaults to the file extension.")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, path, format, batch_size, **options):
+        self.created = self.updated = self.unchanged = self.added = self.removed = 0
+        self.errors = []
+        self.directory_changed = False
+        start = time.perf_counter()
+
+        format = format or ("json" if path.lower().endswith(".json") else "csv")
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            rows = read_json(f) if format == "json" else read_csv(f)
+            for batch in iter(lambda: list(islice(rows, batch_size)), []):
+                self.import_batch(batch)
+
+        if self.directory_changed:
+            bump_org_directory_version()
+        for where, error in self.errors:
+            self.stderr.write(f"{where}: {error}")
+        self.stdout.write(
+            f"Created {self.created}, updated {self.updated}, unchanged {self.unchanged}, "
+            f"skipped {len(self.errors)} user(s); memberships +{self.added} / -{self.removed} "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+
+    def parse_row(self, row):
+        data = {}
+        for key, value in row.items():
+            key = normalize(str(key))
+            field = COLUMNS.get(key)
+            if field is None:
+                continue
+            value = "" if value is None else str(value).strip()
+            # First non-empty alias wins, but a preferred first name (Schoology) beats the legal one.
+            if field not in data or (value and (not data[field] or key == "name_first_preferred")):
+                data[field] = value
+
+        email = data.pop("email", "").lower()
+        try:
+            validate_email(email)
+        except ValidationError:
+            raise RowError(f"Invalid email {email!r}")
+        for field in ("first_name", "last_name"):
+            if len(data.get(field, "")) > 150:
+                raise RowError(f"{field} is longer than 150 characters")
+        if "grad_year" in data:
+            try:
+                data["grad_year"] = int(data["grad_year"]) if data["grad_year"] else None
+            except ValueError:
+                raise RowError(f"Invalid grad_year {data['grad_year']!r}")
+        if data.get("type"):
+            data["type"] = parse_type(data["type"])
+        else:
+            data.pop("type", None)
+        return email, data
+
+    @transaction.atomic
+    def import_batch(self, batch):
+        parsed = {}
+        for where, row in batch:
+            try:
+                email, data = self.parse_row(row)
+            except RowError as e:
+                self.errors.append((where, e))
+            else:
+                parsed[email] = data
+
+        existing = {user.email: user for user in User.objects.filter(email__in=parsed).only("email", *FIELDS)}
+        new, changed, reconcile = [], {}, []
+        for email, data in parsed.items():
+            user = existing.get(email)
+            if user is None:
+                user = User(email=email, **data)
+                if user.type is None:
+                    user.type = UserType.STUDENT if user.grad_year else UserType.STAFF
+                user.set_unusable_password()
+                new.append(user)
+                continue
+            fields = {field for field, value in data.items() if getattr(user, field) != value}
+            if fields:
+                for field in fields:
+                    setattr(user, field, data[field])
+                changed[user] = fields
+                if "grad_year" in fields:
+                    reconcile.append(user.pk)
+        self.unchanged += len(parsed) - len(new) - len(changed)
+
+        User.objects.bulk_create(new)
+        if new and new[0].pk is None:
+            # Only PostgreSQL returns primary keys from bulk inserts.
+            ids = dict(User.objects.filter(email__in=[user.email for user in new]).values_list("email", "id"))
+            for user in new:
+                user.pk = ids[user.email]
+        self.created += len(new)
+
+        # One statement per set of changed columns; a roster usually changes the same ones throughout.
+        groups = {}
+        for user, fields in changed.items():
+            groups.setdefault(tuple(sorted(fields)), []).append(user)
+        for fields, users in groups.items():
+            bulk_update_values(User, users, fields)
+        self.updated += len(changed)
+
+        added, removed = Membership.objects.reconcile_users([user.pk for user in new] + reconcile)
+        self.added += len(added)
+        self.removed += len(removed)
+
+        directory = [user.pk for user, fields in changed.items() if fields & DIRECTORY_FIELDS]
+        if directory and not self.directory_changed:
+            self.directory_changed = Organization.objects.filter(
+                Q(advisors__in=directory) | Q(admins__in=directory)
+            ).exists()
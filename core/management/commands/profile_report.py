@@ -0,0 +1,62 @@
+import json
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks import percentile
+
+
+class Command(BaseCommand):
+    help = "Summarize REQUEST_PROFILE_LOG: latency percentiles, queries and repeated statements per route."
+
+    def add_arguments(self, parser):
+        parser.add_argument("logs", nargs="*", help="Profile logs to read (default: REQUEST_PROFILE_LOG).")
+        parser.add_argument("--sort", choices=("p50", "p95", "queries", "count"), default="p95")
+        parser.add_argument(
+            "--statements", type=int, default=3, help="Repeated statements to list per route."
+        )
+
+    def handle(self, *args, logs, sort, statements, **options):
+        logs = logs or [settings.REQUEST_PROFILE_LOG]
+        if not all(logs):
+            raise CommandError("Set REQUEST_PROFILE_LOG or pass the logs to read.")
+
+        routes = defaultdict(list)
+        for path in logs:
+            try:
+                with open(path) as log:
+                    for line in log:
+                        record = json.loads(line)
+                        routes[f"{record['method']} {record['route']}"].append(record)
+            except FileNotFoundError:
+                raise CommandError(f"No profile log at {path}")
+
+        rows = []
+        for route, records in routes.items():
+            ms = [record["ms"] for record in records]
+            queries = [record["queries"] for record in records]
+            rows.append(
+                {
+                    "route": route,
+                    "count": len(records),
+                    "p50": percentile(ms, 0.5),
+                    "p95": percentile(ms, 0.95),
+                    "queries": percentile(queries, 0.5),
+                    "max_queries": max(queries),
+                    "duplicates": sum(record["duplicates"] for record in records) / len(records),
+                    "repeated": sum((Counter(record["repeated"]) for record in records), Counter()),
+                }
+            )
+        rows.sort(key=lambda row: row[sort], reverse=True)
+
+        self.stdout.write(
+            f"{'route':<44} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'queries':>8} {'max':>5} {'dup/req':>8}"
+        )
+        for row in rows:
+            self.stdout.write(
+                f"{row['route']:<44} {row['count']:>6} {row['p50']:>8.1f} {row['p95']:>8.1f} "
+                f"{row['queries']:>8} {row['max_queries']:>5} {row['duplicates']:>8.1f}"
+            )
+            for sql, count in row["repeated"].most_common(statements):
+                self.stdout.write(f"    repeated {count / row['count']:.0f}x per request: {sql}")
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.models import FeedEntry
+
+
+class Command(BaseCommand):
+    help = "Rebuild materialized post feeds from memberships and published posts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user", type=int, action="append", dest="users", help="Only rebuild these user ids."
+        )
+
+    def handle(self, *args, users, **options):
+        FeedEntry.objects.rebuild(user_ids=users)
+        entries = FeedEntry.objects.all() if users is None else FeedEntry.objects.filter(user_id__in=users)
+        self.stdout.write(f"Rebuilt {entries.count()} feed entries")
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from core.bulk import bulk_update_values
+from core.models import Post
+
+FIELDS = ("content_html", "content_excerpt", "content_hash")
+
+
+class Command(BaseCommand):
+    help = "Fill in the cached HTML and plain-text renderings of posts whose content changed since rendering."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all", action="store_true", help="Re-render every post, e.g. after a markdown upgrade."
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, all, batch_size, **options):
+        rendered = 0
+        batch = []
+        for post in Post.objects.only("content", *FIELDS).order_by("pk").iterator(chunk_size=batch_size):
+            if all:
+                post.content_hash = ""
+            if post.render_content():
+                batch.append(post)
+            if len(batch) >= batch_size:
+                bulk_update_values(Post, batch, FIELDS)
+                rendered += len(batch)
+                batch = []
+        bulk_update_values(Post, batch, FIELDS)
+        rendered += len(batch)
+        self.stdout.write(f"Rendered {rendered} post(s)")
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Membership, Organization, OrganizationType
+
+
+class Command(BaseCommand):
+    help = "Recompute CLASS organization memberships for the given grad years (default: all class years)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", type=int, action="append", dest="years", help="Grad year to recompute.")
+        parser.add_argument("--dry-run", action="store_true", help="Show the changes without making them.")
+
+    def handle(self, *args, years, dry_run, **options):
+        if not years:
+            years = (
+                Organization.objects.filter(type=OrganizationType.CLASS)
+                .order_by("required_grad_year")
+                .values_list("required_grad_year", flat=True)
+                .distinct()
+            )
+        verbose = options["verbosity"] > 1
+
+        def progress(year, added, removed):
+            prefix = "Would change" if dry_run else "Changed"
+            self.stdout.write(f"{year}: {prefix} +{len(added)} / -{len(removed)} membership(s)")
+            if verbose:
+                for sign, rows in (("+", added), ("-", removed)):
+                    for user_id, organization_id in rows:
+                        self.stdout.write(f"  {sign} user {user_id} organization {organization_id}")
+
+        results = Membership.objects.reconcile_grad_years(list(years), dry_run=dry_run, progress=progress)
+        added = sum(len(a) for a, _ in results.values())
+        removed = sum(len(r) for _, r in results.values())
+        self.stdout.write(f"Total: +{added} / -{removed} membership(s){' (dry run)' if dry_run else ''}")
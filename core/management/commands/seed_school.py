@@ -0,0 +1,269 @@
+import random
+import time
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from core.bulk import bulk_update_values
+from core.cache import bump_org_directory_version
+from core.models import (
+    DayOfWeek,
+    ExpoPushToken,
+    FeedEntry,
+    Membership,
+    Organization,
+    OrganizationLink,
+    OrganizationType,
+    Post,
+    User,
+    UserType,
+)
+
+# Seeded users and orgs are recognizable by these, so --flush can remove exactly them.
+EMAIL_DOMAIN = "seed.example.com"
+ADMIN_EMAIL = f"admin@{EMAIL_DOMAIN}"
+ORG_PREFIX = "Seed "
+
+FIRST_NAMES = """
+Aarav Ava Chen Diego Elena Fatima Grace Hiro Isabella Jamal
+Kavya Liam Mei Noah Olivia Priya Quinn Rohan Sofia Tran
+""".split()
+LAST_NAMES = """
+Nguyen Patel Garcia Kim Smith Chen Singh Lopez Wang Johnson
+Kumar Martinez Lee Brown Tran Shah Davis Wu Rodriguez Gupta
+""".split()
+CLUBS = (
+    "Robotics",
+    "Chess",
+    "Debate",
+    "Key Club",
+    "Math",
+    "Science Olympiad",
+    "Drama",
+    "Photography",
+    "Coding",
+    "Environmental",
+    "Red Cross",
+    "Model UN",
+    "Art",
+    "Jazz Band",
+    "Anime",
+    "Dance",
+    "Journalism",
+    "Speech",
+    "Film",
+    "Mock Trial",
+)
+LOCATIONS = ("Room 101", "Room 204", "Room 315", "Library", "Gym", "Theater", "Quad")
+TIMES = ("Lunch", "7:30 AM", "3:30 PM", "4:00 PM")
+WORDS = """
+meeting lunch room forms due reminder welcome practice event signup
+volunteer hours competition team snacks fundraiser tickets deadline members officers
+elections workshop bring laptop permission slip
+""".split()
+# Distinct post bodies; each is rendered once and the renderings reused.
+BODIES = 200
+BATCH_SIZE = 1000
+
+
+def class_years(today):
+    """Grad years of the four classes in school on ``today``; the school year starts in August."""
+    first = today.year + (1 if today.month >= 8 else 0)
+    return list(range(first, first + 4))
+
+
+def batches(objs, size=BATCH_SIZE):
+    objs = iter(objs)
+    return iter(lambda: list(islice(objs, size)), [])
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic school: students across the four class years, staff, GLOBAL/CLASS/CLUB orgs "
+        "with advisors and admins, memberships, push tokens and posts. The same --seed gives the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=2000)
+        parser.add_argument("--staff", type=int, default=100)
+        parser.add_argument("--clubs", type=int, default=80)
+        parser.add_argument("--clubs-per-student", type=int, default=4, help="Average club memberships.")
+        parser.add_argument("--posts", type=int, default=20000)
+        parser.add_argument("--days", type=int, default=365, help="Spread post dates over this many days.")
+        parser.add_argument(
+            "--token-share", type=float, default=0.7, help="Share of users with a push token."
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--flush", action="store_true", help="Delete previously seeded data first.")
+
+    def handle(self, *args, flush, seed, **options):
+        start = time.perf_counter()
+        users = User.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}")
+        orgs = Organization.objects.filter(name__startswith=ORG_PREFIX)
+        if users.exists() or orgs.exists():
+            if not flush:
+                raise CommandError("Seeded data already exists. Run with --flush to replace it.")
+            orgs.delete()
+            users.delete()
+
+        self.rng = random.Random(seed)
+        self.now = timezone.now()
+        with transaction.atomic():
+            students, staff = self.create_users(options["students"], options["staff"])
+            clubs, required = self.create_orgs(options["clubs"], staff, students)
+            self.join_clubs(students, clubs, options["clubs_per_student"])
+            Membership.objects.reconcile_users([user.pk for user in students + staff])
+            self.create_tokens(students + staff, options["token_share"])
+            self.create_posts(required + clubs, options["posts"], options["days"])
+            if settings.POST_FEED_MATERIALIZED:
+                FeedEntry.objects.rebuild(user_ids=[user.pk for user in students + staff])
+            bump_org_directory_version()
+
+        memberships = Membership.objects.filter(user__email__endswith=f"@{EMAIL_DOMAIN}").count()
+        self.stdout.write(
+            f"Seeded {len(students)} students, {len(staff)} staff, {len(required) + len(clubs)} orgs, "
+            f"{memberships} memberships and {options['posts']} posts in {time.perf_counter() - start:.1f}s. "
+            f"Admin: {ADMIN_EMAIL}"
+        )
+
+    def name(self):
+        return self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+
+    def create_users(self, student_count, staff_count):
+        years = class_years(self.now.date())
+        users = [User(email=ADMIN_EMAIL, type=UserType.STAFF, is_staff=True, is_superuser=True)]
+        for i in range(staff_count):
+            first, last = self.name()
+            email = f"{first}.{last}.{i}@{EMAIL_DOMAIN}".lower()
+            users.append(User(email=email, first_name=first, last_name=last, type=UserType.STAFF))
+        for i in range(student_count):
+            first, last = self.name()
+            email = f"{first[0]}{last}{i}@{EMAIL_DOMAIN}".lower()
+            users.append(
+                User(
+                    email=email,
+                    first_name=first,
+                    last_name=last,
+                    type=UserType.STUDENT,
+                    grad_year=years[i % len(years)],
+                )
+            )
+        for user in users:
+            user.set_unusable_password()
+        for batch in batches(users):
+            User.objects.bulk_create(batch)
+        staff = [user for user in users if user.type == UserType.STAFF]
+        students = [user for user in users if user.type == UserType.STUDENT]
+        return students, staff
+
+    def create_orgs(self, club_count, staff, students):
+        required = [Organization(name=f"{ORG_PREFIX}ASB", type=OrganizationType.GLOBAL, required=True)]
+        for year in class_years(self.now.date()):
+            required.append(
+                Organization(
+                    name=f"{ORG_PREFIX}Class of {year}", type=OrganizationType.CLASS, required_grad_year=year
+                )
+            )
+        clubs = []
+        for i in range(club_count):
+            name = CLUBS[i % len(CLUBS)] + (f" {i // len(CLUBS) + 1}" if i >= len(CLUBS) else "")
+            clubs.append(
+                Organization(
+                    name=f"{ORG_PREFIX}{name}",
+                    type=OrganizationType.CLUB,
+                    day=self.rng.choice(DayOfWeek.values[:5]),
+                    time=self.rng.choice(TIMES),
+                    location=self.rng.choice(LOCATIONS),
+                    description=self.sentence(30),
+                )
+            )
+        Organization.objects.bulk_create(required + clubs)
+
+        advisors, admins, links = [], [], []
+        for org in required + clubs:
+            for user in self.rng.sample(staff, min(len(staff), self.rng.randint(1, 2))):
+                advisors.append(Organization.advisors.through(organization_id=org.pk, user_id=user.pk))
+            for user in self.rng.sample(students, min(len(students), self.rng.randint(1, 3))):
+                admins.append(Organization.admins.through(organization_id=org.pk, user_id=user.pk))
+            for i in range(self.rng.randint(0, 2)):
+                links.append(
+                    OrganizationLink(
+                        organization=org, title=f"Link {i + 1}", url=f"https://example.com/{org.pk}/{i}"
+                    )
+                )
+        Organization.advisors.through.objects.bulk_create(advisors)
+        Organization.admins.through.objects.bulk_create(admins)
+        OrganizationLink.objects.bulk_create(links)
+        # Club admins are members of their club.
+        Membership.objects.bulk_create(
+            [Membership(organization_id=row.organization_id, user_id=row.user_id) for row in admins],
+            ignore_conflicts=True,
+        )
+        return clubs, required
+
+    def join_clubs(self, students, clubs, average):
+        if not clubs:
+            return
+        memberships = (
+            Membership(user_id=user.pk, organization_id=org.pk)
+            for user in students
+            for org in self.rng.sample(clubs, min(len(clubs), self.rng.randint(0, 2 * average)))
+        )
+        for batch in batches(memberships):
+            Membership.objects.bulk_create(batch, ignore_conflicts=True)
+
+    def create_tokens(self, users, share):
+        tokens = (
+            ExpoPushToken(user_id=user.pk, token=f"ExponentPushToken[seed-{user.pk}]")
+            for user in users
+            if self.rng.random() < share
+        )
+        for batch in batches(tokens):
+            ExpoPushToken.objects.bulk_create(batch)
+
+    def sentence(self, words):
+        return " ".join(self.rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+    def body(self):
+        paragraphs = [self.sentence(self.rng.randint(10, 40)) for _ in range(self.rng.randint(1, 4))]
+        if self.rng.random() < 0.5:
+            paragraphs.append(
+                "\n".join(f"- **{self.rng.choice(WORDS)}**: {self.sentence(6)}" for _ in range(3))
+            )
+        if self.rng.random() < 0.3:
+            paragraphs.append(f"[Sign up here](https://example.com/{self.rng.randint(1, 999)})")
+        return "\n\n".join(paragraphs)
+
+    def create_posts(self, orgs, count, days):
+        rendered = []
+        for _ in range(BODIES):
+            post = Post(content=self.body())
+            post.render_content()
+            rendered.append(post)
+        # School-wide and class orgs post more often than any one club.
+        weights = [5 if org.type != OrganizationType.CLUB else 1 for org in orgs]
+
+        def posts():
+            for i in range(count):
+                body = self.rng.choice(rendered)
+                yield Post(
+                    organization_id=self.rng.choices(orgs, weights)[0].pk,
+                    title=self.sentence(self.rng.randint(2, 6))[:-1],
+                    content=body.content,
+                    content_html=body.content_html,
+                    content_excerpt=body.content_excerpt,
+                    content_hash=body.content_hash,
+                    published=self.rng.random() < 0.9,
+                )
+
+        seconds = days * 24 * 60 * 60
+        for batch in batches(posts()):
+            Post.objects.bulk_create(batch)
+            # bulk_create stamps date (auto_now) with the current time; spread them out afterwards.
+            for post in batch:
+                post.date = self.now - timedelta(seconds=self.rng.uniform(0, seconds))
+            bulk_update_values(Post, batch, ["date"])
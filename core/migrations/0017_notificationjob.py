@@ -0,0 +1,34 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:59
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_remove_membership_active'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.IntegerField(choices=[(1, 'Pending'), (2, 'Sending'), (3, 'Sent'), (4, 'Failed')], default=1)),
+                ('attempts', models.IntegerField(default=0)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('sent_tokens', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=200), blank=True, default=list, size=None)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_jobs', to='core.post')),
+            ],
+            options={
+                'ordering': ('available_at',),
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.2.25 on 2026-10-18 09:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_notificationjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expopushtoken',
+            name='failure_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='expopushtoken',
+            name='last_failure_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='PushTicket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=200)),
+                ('ticket_id', models.CharField(max_length=100, unique=True)),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tickets', to='core.notificationjob')),
+            ],
+        ),
+    ]
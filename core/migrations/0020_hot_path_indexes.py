@@ -0,0 +1,39 @@
+# Generated by Django 3.2.25 on 2026-10-18 09:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_feedentry'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='organization',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.organization'),
+        ),
+        migrations.AddIndex(
+            model_name='organization',
+            index=models.Index(fields=['type', 'name'], name='core_organization_type_name'),
+        ),
+        migrations.AddIndex(
+            model_name='organization',
+            index=models.Index(condition=models.Q(('required_grad_year__isnull', False)), fields=['required_grad_year'], name='core_organization_grad_year'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('published', True)), fields=['-date', '-id'], name='core_post_published_date_id'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['organization', '-date', '-id'], include=('published',), name='core_post_org_date'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['grad_year'], name='core_user_grad_year'),
+        ),
+    ]
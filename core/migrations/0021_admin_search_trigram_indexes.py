@@ -0,0 +1,55 @@
+# Written by hand: trigram indexes are PostgreSQL-only, need the pg_trgm extension and have no model state.
+
+import warnings
+
+from django.db import migrations
+
+# Admin search uses icontains, which PostgreSQL compiles to UPPER("column"::text) LIKE UPPER(%s),
+# so the indexes are on that expression.
+INDEXES = [
+    ("core_user_email_trgm", "core_user", "email"),
+    ("core_user_first_name_trgm", "core_user", "first_name"),
+    ("core_user_last_name_trgm", "core_user", "last_name"),
+    ("core_expopushtoken_token_trgm", "core_expopushtoken", "token"),
+]
+
+
+def trigram_available(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    if not trigram_available(schema_editor):
+        # Admin search still works without them, with sequential scans.
+        warnings.warn("pg_trgm is not available; skipping the admin search trigram indexes.")
+        return
+    qn = schema_editor.quote_name
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, table, column in INDEXES:
+        schema_editor.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {qn(name)} "
+            f"ON {qn(table)} USING gin (UPPER({qn(column)}::text) gin_trgm_ops)"
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, _, _ in INDEXES:
+        schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {schema_editor.quote_name(name)}")
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('core', '0020_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
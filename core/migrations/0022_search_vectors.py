@@ -0,0 +1,65 @@
+# Generated by Django 3.2.25 on 2026-10-18 09:23, with the search triggers added by hand
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def search_trigger(table, weighted_columns):
+    """
+    A trigger keeping {table}.search_vector up to date, so bulk writes and raw SQL are covered too.
+    Existing rows are filled in by touching the first column.
+    """
+    vector = " || ".join(
+        f"setweight(to_tsvector('english', coalesce(NEW.{column}, '')), '{weight}')"
+        for column, weight in weighted_columns
+    )
+    columns = ", ".join(column for column, _ in weighted_columns)
+    first = weighted_columns[0][0]
+    return migrations.RunSQL(
+        f"""
+        CREATE FUNCTION {table}_search_vector() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {vector};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+        CREATE TRIGGER {table}_search_vector BEFORE INSERT OR UPDATE OF {columns} ON {table}
+            FOR EACH ROW EXECUTE PROCEDURE {table}_search_vector();
+        UPDATE {table} SET {first} = {first};
+        """,
+        f"""
+        DROP TRIGGER {table}_search_vector ON {table};
+        DROP FUNCTION {table}_search_vector();
+        """,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_admin_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organization',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        search_trigger("core_organization", [("name", "A"), ("description", "B")]),
+        search_trigger("core_post", [("title", "A"), ("content", "B")]),
+        migrations.AddIndex(
+            model_name='organization',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='core_organization_search'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='core_post_search'),
+        ),
+    ]
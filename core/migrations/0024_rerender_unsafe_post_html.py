@@ -0,0 +1,34 @@
+# Written by hand: re-renders the stored HTML of posts that may contain raw HTML or unsafe link URLs,
+# which render_markdown() used to pass through.
+
+from django.db import migrations
+from django.db.models import Q
+
+from core import rendering
+
+FIELDS = ("content_html", "content_excerpt")
+
+
+def rerender(apps, schema_editor):
+    Post = apps.get_model("core", "Post")
+    # Raw HTML needs a "<", and a URL with a scheme a ":"; other posts render the same as before.
+    posts = Post.objects.filter(Q(content__contains="<") | Q(content__contains=":")).only("content", *FIELDS)
+    changed = []
+    for post in posts.iterator(chunk_size=1000):
+        html, text = rendering.render_markdown(post.content)
+        if html != post.content_html:
+            post.content_html = html
+            post.content_excerpt = rendering.excerpt(text)
+            changed.append(post)
+    Post.objects.bulk_update(changed, FIELDS, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_post_renderings'),
+    ]
+
+    operations = [
+        migrations.RunPython(rerender, migrations.RunPython.noop),
+    ]
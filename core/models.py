@@ -1,18 +1,26 @@
 from django.contrib.postgres.fields import ArrayField
-from django.contrib.auth import get_user_model
-from django.db.models.signals import post_delete, post_save, pre_save
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.conf import settings
 from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator
+from django.db import connection, connections, transaction
 from django.db.models import *
+from django.utils import timezone
 from django.utils.translation import gettext as _
-from core.notifications import send_notifications
-from datetime import datetime
+from core import notifications, rendering
+from core.cache import bump_org_directory_version, forget_claims
+from datetime import timedelta
+from itertools import islice
 
 USER_MODEL = settings.AUTH_USER_MODEL
+# Text search configuration of the search_vector columns, which are kept up to date by database
+# triggers (see migration 0022). Changing it means rewriting those triggers.
+SEARCH_CONFIG = "english"
 
 
 class DayOfWeek(IntegerChoices):
@@ -43,6 +51,28 @@ class LowercaseEmailField(EmailField):
 
 
 
+class TrackedFieldsMixin:
+    """Remembers the loaded values of ``tracked_fields`` so signals can skip work when nothing changed."""
+
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        loaded = instance.__dict__
+        instance._loaded_values = {f: loaded[f] for f in cls.tracked_fields if f in loaded}
+        return instance
+
+    def has_changed(self, *fields):
+        loaded = getattr(self, "_loaded_values", None)
+        if loaded is None:
+            return True
+        return any(f not in loaded or loaded[f] != getattr(self, f) for f in fields or self.tracked_fields)
+
+    def reset_tracked_fields(self):
+        self._loaded_values = {f: getattr(self, f) for f in self.tracked_fields}
+
+
 class UserManager(BaseUserManager):
     def _create_user(self, email, password, **extra_fields):
         email = self.normalize_email(email)
@@ -68,10 +98,14 @@ class UserManager(BaseUserManager):
         return self._create_user(email, password, **extra_fields)
 
 
-class User(AbstractUser):
+class User(TrackedFieldsMixin, AbstractUser):
+    class Meta(AbstractUser.Meta):
+        indexes = [Index(name="%(app_label)s_%(class)s_grad_year", fields=("grad_year",))]
+
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["type"]
     objects = UserManager()
+    tracked_fields = ("grad_year",)
 
     username = None
     email = LowercaseEmailField(_("email address"), unique=True)
@@ -82,20 +116,75 @@ class User(AbstractUser):
         default="https://upload.wikimedia.org/wikipedia/commons/7/7c/Profile_avatar_placeholder_large.png"
     )
 
-    
+    def refresh_from_db(self, using=None, fields=None):
+        claims_only = getattr(self, "_claims_only", False)
+        # Users built from JWT claims (core.authentication) load the rest of the row in one go.
+        if fields is not None and claims_only:
+            fields = {*fields, *self.get_deferred_fields()}
+        super().refresh_from_db(using, fields)
+        if fields is None and claims_only:
+            # The token's values have been replaced by the current ones.
+            self._claims_only = False
+
+    def save(self, *args, **kwargs):
+        if getattr(self, "_claims_only", False):
+            # Saving would write back the token's type, grad_year, is_staff, is_superuser and is_active,
+            # undoing any change made to them since the token was issued.
+            raise ValueError("A user built from token claims can't be saved; load it from the database.")
+        super().save(*args, **kwargs)
+
     def __str__(self):
         if self.grad_year is None:
             return f"{self.first_name} {self.last_name} ({self.email})"
         return f"{self.first_name} {self.last_name}, {self.grad_year} ({self.email})"
 
+class ExpoPushTokenQuerySet(QuerySet):
+    def record_results(self, results):
+        """Apply a {token: error or None} map from Expo tickets/receipts to the stored tokens."""
+        dead = [token for token, error in results.items() if error == "DeviceNotRegistered"]
+        failed = [token for token, error in results.items() if error and error != "DeviceNotRegistered"]
+        ok = [token for token, error in results.items() if error is None]
+
+        if dead:
+            self.filter(token__in=dead).delete()
+        if failed:
+            self.filter(token__in=failed).update(
+                failure_count=F("failure_count") + 1, last_failure_at=timezone.now()
+            )
+            self.filter(token__in=failed, failure_count__gte=settings.EXPO_TOKEN_MAX_FAILURES).delete()
+        if ok:
+            self.filter(token__in=ok, failure_count__gt=0).update(failure_count=0)
+
+
 class ExpoPushToken(Model):
+    objects = ExpoPushTokenQuerySet.as_manager()
+
     user = ForeignKey(User, on_delete=CASCADE, related_name="expo_push_tokens")
     token = CharField(max_length=200, unique=True)
+    failure_count = IntegerField(default=0)
+    last_failure_at = DateTimeField(null=True, blank=True)
+
+
+class SearchableQuerySet(QuerySet):
+    def search(self, text):
+        """Rows matching a web-style query (quoted phrases, or, -word), best match first."""
+        query = SearchQuery(text, search_type="websearch", config=SEARCH_CONFIG)
+        rank = SearchRank(F("search_vector"), query)
+        return self.filter(search_vector=query).annotate(rank=rank).order_by("-rank")
 
 
-class Organization(Model):
+class Organization(TrackedFieldsMixin, Model):
     class Meta:
         ordering = ("type", "name")
+        indexes = [
+            Index(name="%(app_label)s_%(class)s_type_name", fields=("type", "name")),
+            Index(
+                name="%(app_label)s_%(class)s_grad_year",
+                fields=("required_grad_year",),
+                condition=Q(required_grad_year__isnull=False),
+            ),
+            GinIndex(name="%(app_label)s_%(class)s_search", fields=("search_vector",)),
+        ]
         constraints = [
             CheckConstraint(
                 name="%(app_label)s_%(class)s_type",
@@ -118,6 +207,9 @@ class Organization(Model):
                 ),
             )
         ]
+    tracked_fields = ("required", "required_grad_year")
+    objects = SearchableQuerySet.as_manager()
+
     type = IntegerField(choices=OrganizationType.choices)
     advisors = ManyToManyField(USER_MODEL, related_name="advisor_organizations", blank=True)
     admins = ManyToManyField(USER_MODEL, related_name="admin_organizations", blank=True)
@@ -132,6 +224,9 @@ class Organization(Model):
     location = CharField(max_length=200, null=True, blank=True)
     time = CharField(max_length=200, null=True, blank=True)
 
+    # Weighted name (A) and description (B), maintained by a trigger.
+    search_vector = SearchVectorField(null=True, editable=False)
+
     def is_admin(self, user):
         return self.admins.filter(id=user.id).exists()
 
@@ -147,42 +242,439 @@ class OrganizationLink(Model):
     title = CharField(max_length=200)
     url = URLField()
 
+class MembershipQuerySet(QuerySet):
+    """
+    Set-based reconciliation of required memberships: GLOBAL orgs contain every user and CLASS
+    orgs contain exactly the users of their grad year. Each call is a constant number of statements.
+    """
+
+    def _execute(self, sql, params):
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def _tables(self):
+        qn = connections[self.db].ops.quote_name
+        return qn(Membership._meta.db_table), qn(Organization._meta.db_table), qn(User._meta.db_table)
+
+    def _by_organization(self, rows):
+        users = {}
+        for user_id, organization_id in rows:
+            users.setdefault(organization_id, []).append(user_id)
+        return users.items()
+
+    def _insert_memberships(self, select_sql, params):
+        membership, _, _ = self._tables()
+        rows = self._execute(
+            f"INSERT INTO {membership} (user_id, organization_id) {select_sql} "
+            "ON CONFLICT DO NOTHING RETURNING user_id, organization_id",
+            params,
+        )
+        if settings.POST_FEED_MATERIALIZED:
+            for organization_id, user_ids in self._by_organization(rows):
+                FeedEntry.objects.add_memberships(user_ids, [organization_id])
+        return rows
+
+    def _delete_memberships(self, where_sql, params):
+        membership, _, _ = self._tables()
+        rows = self._execute(
+            f"DELETE FROM {membership} WHERE {where_sql} RETURNING user_id, organization_id", params
+        )
+        if settings.POST_FEED_MATERIALIZED:
+            for organization_id, user_ids in self._by_organization(rows):
+                FeedEntry.objects.remove_memberships(user_ids, [organization_id])
+        return rows
+
+    def reconcile_user(self, user):
+        _, organization, _ = self._tables()
+        added = self._insert_memberships(
+            f"SELECT %s, id FROM {organization} WHERE required OR required_grad_year = %s",
+            [user.pk, user.grad_year],
+        )
+        removed = self._delete_memberships(
+            f"user_id = %s AND organization_id IN (SELECT id FROM {organization} "
+            "WHERE required_grad_year IS NOT NULL AND (%s IS NULL OR required_grad_year <> %s))",
+            [user.pk, user.grad_year, user.grad_year],
+        )
+        return added, removed
+
+    def reconcile_users(self, user_ids):
+        """reconcile_user() for many users at once, still two statements."""
+        if not user_ids:
+            return [], []
+        membership, organization, user = self._tables()
+        ids = ", ".join(["%s"] * len(user_ids))
+        added = self._insert_memberships(
+            f"SELECT u.id, o.id FROM {user} u INNER JOIN {organization} o "
+            f"ON o.required OR o.required_grad_year = u.grad_year WHERE u.id IN ({ids})",
+            list(user_ids),
+        )
+        removed = self._delete_memberships(
+            f"user_id IN ({ids}) AND organization_id IN (SELECT id FROM {organization} o "
+            f"WHERE o.required_grad_year IS NOT NULL AND NOT EXISTS (SELECT 1 FROM {user} u "
+            f"WHERE u.id = {membership}.user_id AND u.grad_year = o.required_grad_year))",
+            list(user_ids),
+        )
+        return added, removed
+
+    def reconcile_grad_years(self, years, dry_run=False, progress=None):
+        """
+        Recompute CLASS memberships for every user and CLASS org of the given grad years in one
+        transaction, two statements per year. Returns {year: (added, removed)} lists of
+        (user_id, organization_id) rows.
+        """
+        membership, organization, user = self._tables()
+        select = (
+            f"SELECT u.id, o.id FROM {user} u "
+            f"INNER JOIN {organization} o ON o.required_grad_year = u.grad_year WHERE u.grad_year = %s"
+        )
+        where = (
+            f"organization_id IN (SELECT id FROM {organization} WHERE required_grad_year IS NOT NULL) AND ("
+            f"(user_id IN (SELECT id FROM {user} WHERE grad_year = %s) "
+            f"AND organization_id NOT IN (SELECT id FROM {organization} WHERE required_grad_year = %s)) "
+            f"OR (organization_id IN (SELECT id FROM {organization} WHERE required_grad_year = %s) "
+            f"AND user_id NOT IN (SELECT id FROM {user} WHERE grad_year = %s)))"
+        )
+        results = {}
+        seen = set()
+        with transaction.atomic(using=self.db):
+            for year in years:
+                if dry_run:
+                    added = self._execute(
+                        f"{select} AND NOT EXISTS (SELECT 1 FROM {membership} m "
+                        "WHERE m.user_id = u.id AND m.organization_id = o.id)",
+                        [year],
+                    )
+                    removed = self._execute(
+                        f"SELECT user_id, organization_id FROM {membership} WHERE {where}", [year] * 4
+                    )
+                    # A real run would already have deleted rows matched by an earlier year.
+                    removed = [row for row in removed if row not in seen]
+                    seen.update(removed)
+                else:
+                    added = self._insert_memberships(select, [year])
+                    removed = self._delete_memberships(where, [year] * 4)
+                results[year] = (added, removed)
+                if progress is not None:
+                    progress(year, added, removed)
+        return results
+
+    def reconcile_organization(self, org):
+        _, _, user = self._tables()
+        added = removed = []
+        if org.required:
+            added = self._insert_memberships(f"SELECT id, %s FROM {user} WHERE true", [org.pk])
+        elif org.required_grad_year is not None:
+            added = self._insert_memberships(
+                f"SELECT id, %s FROM {user} WHERE grad_year = %s", [org.pk, org.required_grad_year]
+            )
+            removed = self._delete_memberships(
+                f"organization_id = %s AND user_id NOT IN (SELECT id FROM {user} WHERE grad_year = %s)",
+                [org.pk, org.required_grad_year],
+            )
+        return added, removed
+
+
 class Membership(Model):
     class Meta:
         constraints = [
             UniqueConstraint(name="%(app_label)s_%(class)s_user_organization", fields=("user", "organization"))
         ]
+    objects = MembershipQuerySet.as_manager()
+
     user = ForeignKey(User, on_delete=CASCADE, related_name="memberships")
     organization = ForeignKey(Organization, on_delete=CASCADE, related_name="memberships")
 
 class Post(Model):
     class Meta:
         ordering = ("-date",)
+        indexes = [
+            Index(
+                name="%(app_label)s_%(class)s_published_date_id",
+                fields=("-date", "-id"),
+                condition=Q(published=True),
+            ),
+            # Also the foreign key's index: a partial one beside the plain foreign key index lost to it
+            # (plus a sort) on small orgs. published is included so feed counts stay index-only.
+            Index(
+                name="%(app_label)s_%(class)s_org_date",
+                fields=("organization", "-date", "-id"),
+                include=("published",),
+            ),
+            GinIndex(name="%(app_label)s_%(class)s_search", fields=("search_vector",)),
+        ]
 
-    organization = ForeignKey(Organization, on_delete=CASCADE)
+    objects = SearchableQuerySet.as_manager()
+
+    organization = ForeignKey(Organization, on_delete=CASCADE, db_index=False)
     title = CharField(max_length=200)
     date = DateTimeField(auto_now=True)
     content = TextField()
     published = BooleanField(default=False)
 
+    # Weighted title (A) and content (B), maintained by a trigger.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # Renderings of the markdown content, refreshed on save when content_hash no longer matches.
+    # Rows written in bulk are filled in by `manage.py render_posts`.
+    content_html = TextField(blank=True, editable=False)
+    content_excerpt = TextField(blank=True, editable=False)
+    content_hash = CharField(max_length=64, blank=True, editable=False)
+
+    def render_content(self):
+        """Refresh the cached renderings if the content changed. Returns whether it did."""
+        digest = rendering.content_hash(self.content)
+        if digest == self.content_hash:
+            return False
+        self.content_html, text = rendering.render_markdown(self.content)
+        self.content_excerpt = rendering.excerpt(text)
+        self.content_hash = digest
+        return True
+
     def __str__(self):
         return self.title
-    
+
+
+class NotificationJobStatus(IntegerChoices):
+    PENDING = 1
+    SENDING = 2
+    SENT = 3
+    FAILED = 4
+
+
+class NotificationJobQuerySet(QuerySet):
+    def ready(self):
+        now = timezone.now()
+        stale = now - timedelta(seconds=settings.NOTIFICATION_JOB_LOCK_TIMEOUT)
+        return self.filter(
+            Q(status=NotificationJobStatus.PENDING, available_at__lte=now)
+            | Q(status=NotificationJobStatus.SENDING, locked_at__lt=stale)
+        )
+
+    def dispatch(self, limit=None):
+        sent = 0
+        for pk in self.ready().order_by("available_at").values_list("pk", flat=True)[:limit]:
+            job = NotificationJob.claim(pk)
+            if job is not None and job.dispatch():
+                sent += 1
+        return sent
+
+
+class NotificationJob(Model):
+    """Outbox row for a post's push notification, drained by the dispatch_notifications command."""
+
+    class Meta:
+        ordering = ("available_at",)
+
+    objects = NotificationJobQuerySet.as_manager()
+
+    post = ForeignKey(Post, on_delete=CASCADE, related_name="notification_jobs")
+    status = IntegerField(choices=NotificationJobStatus.choices, default=NotificationJobStatus.PENDING)
+    attempts = IntegerField(default=0)
+    created = DateTimeField(auto_now_add=True)
+    available_at = DateTimeField(default=timezone.now)
+    locked_at = DateTimeField(null=True, blank=True)
+    sent_at = DateTimeField(null=True, blank=True)
+    error = TextField(blank=True)
+    # Tokens whose chunk Expo accepted, so a retry after a partial failure does not push them twice.
+    sent_tokens = ArrayField(CharField(max_length=200), default=list, blank=True)
+
+    @classmethod
+    def claim(cls, pk):
+        now = timezone.now()
+        claimed = cls.objects.ready().filter(pk=pk).update(
+            status=NotificationJobStatus.SENDING, locked_at=now
+        )
+        if not claimed:
+            return None
+        return cls.objects.select_related("post__organization").get(pk=pk)
+
+    def get_tokens(self):
+        return list(
+            ExpoPushToken.objects.filter(user__memberships__organization_id=self.post.organization_id)
+            .values_list("token", flat=True)
+            .distinct()
+        )
+
+    def dispatch(self):
+        post = self.post
+        date = timezone.localtime(self.created).strftime("%Y-%m-%d")
+        self.attempts += 1
+        # A retry only sends to the tokens whose chunks Expo has not accepted yet.
+        sent = set(self.sent_tokens)
+        tokens = [token for token in self.get_tokens() if token not in sent]
+        # Rows created in bulk may not have been rendered yet.
+        if post.render_content():
+            Post.objects.filter(pk=post.pk).update(
+                content_html=post.content_html,
+                content_excerpt=post.content_excerpt,
+                content_hash=post.content_hash,
+            )
+        messages = notifications.build_messages(
+            tokens, post.title, post.content_excerpt, post.id, date, post.organization.name
+        )
+        results, errors = [], []
+        for chunk, tickets in notifications.send_chunks(messages):
+            if isinstance(tickets, Exception):
+                errors.append(tickets)
+            else:
+                results.extend((message["to"], ticket) for message, ticket in zip(chunk, tickets))
+        self.sent_tokens += [token for token, ticket in results]
+
+        PushTicket.objects.bulk_create(
+            PushTicket(job=self, token=token, ticket_id=ticket["id"])
+            for token, ticket in results
+            if ticket.get("status") == "ok"
+        )
+        ExpoPushToken.objects.record_results(
+            {
+                token: error
+                for token, ticket in results
+                if (error := notifications.get_error(ticket)) is not None
+            }
+        )
+
+        if errors:
+            self.error = repr(errors[0])
+            self.locked_at = None
+            if self.attempts >= settings.NOTIFICATION_JOB_MAX_ATTEMPTS:
+                self.status = NotificationJobStatus.FAILED
+            else:
+                self.status = NotificationJobStatus.PENDING
+                self.available_at = timezone.now() + timedelta(seconds=30 * 2**self.attempts)
+            self.save(
+                update_fields=("status", "attempts", "error", "locked_at", "available_at", "sent_tokens")
+            )
+            return False
+        self.status = NotificationJobStatus.SENT
+        self.sent_at = timezone.now()
+        self.error = ""
+        self.save(update_fields=("status", "attempts", "error", "sent_at", "sent_tokens"))
+        return True
+
+
+class PushTicketQuerySet(QuerySet):
+    def check_receipts(self, limit=None):
+        """Fetch receipts for tickets old enough to have one and prune the tokens Expo rejected."""
+        cutoff = timezone.now() - timedelta(seconds=settings.EXPO_RECEIPT_DELAY)
+        tickets = dict(self.filter(created__lte=cutoff).values_list("ticket_id", "token")[:limit])
+        if not tickets:
+            return 0
+
+        receipts = notifications.get_receipts(tickets)
+        ExpoPushToken.objects.record_results(
+            {tickets[ticket_id]: notifications.get_error(receipt) for ticket_id, receipt in receipts.items()}
+        )
+        # Expo drops receipts after a day; anything still missing by then will never arrive.
+        expired = timezone.now() - timedelta(days=1)
+        self.filter(Q(ticket_id__in=receipts) | Q(created__lt=expired)).delete()
+        return len(receipts)
+
+
+class PushTicket(Model):
+    """An Expo push ticket awaiting its receipt."""
+
+    objects = PushTicketQuerySet.as_manager()
+
+    job = ForeignKey(NotificationJob, on_delete=CASCADE, related_name="tickets")
+    token = CharField(max_length=200)
+    ticket_id = CharField(max_length=100, unique=True)
+    created = DateTimeField(auto_now_add=True, db_index=True)
+
+
+class FeedEntryQuerySet(QuerySet):
+    def add_rows(self, rows, batch_size=1000):
+        rows = iter(rows)
+        while batch := list(islice(rows, batch_size)):
+            entries = [FeedEntry(user_id=u, post_id=p, date=d) for u, p, d in batch]
+            self.bulk_create(entries, ignore_conflicts=True)
+
+    def add_post(self, post):
+        users = Membership.objects.filter(organization_id=post.organization_id)
+        users = users.values_list("user_id", flat=True)
+        entries = self.filter(post=post)
+        entries.exclude(user_id__in=users).delete()
+        entries.exclude(date=post.date).update(date=post.date)
+        self.add_rows((user_id, post.pk, post.date) for user_id in users.iterator())
+
+    def remove_post(self, post):
+        self.filter(post=post).delete()
+
+    def add_memberships(self, user_ids, organization_ids):
+        rows = Membership.objects.filter(
+            user_id__in=user_ids, organization_id__in=organization_ids, organization__post__published=True
+        ).values_list("user_id", "organization__post__id", "organization__post__date")
+        self.add_rows(rows.iterator())
+
+    def remove_memberships(self, user_ids, organization_ids):
+        self.filter(user_id__in=user_ids, post__organization_id__in=organization_ids).delete()
+
+    @transaction.atomic
+    def rebuild(self, user_ids=None):
+        memberships = Membership.objects.filter(organization__post__published=True)
+        entries = self.all()
+        if user_ids is not None:
+            memberships = memberships.filter(user_id__in=user_ids)
+            entries = entries.filter(user_id__in=user_ids)
+        entries.delete()
+        rows = memberships.values_list("user_id", "organization__post__id", "organization__post__date")
+        self.add_rows(rows.iterator())
+
+    def diff(self):
+        """
+        Compare feeds against memberships and published posts without loading either: returns lazy
+        querysets of missing (user_id, post_id) pairs, entries that should not exist and entries whose
+        date differs from their post's.
+        """
+        expected = Membership.objects.filter(
+            user_id=OuterRef("user_id"), organization_id=OuterRef("post__organization_id")
+        )
+        missing = Membership.objects.filter(organization__post__published=True).exclude(
+            Exists(self.filter(user_id=OuterRef("user_id"), post_id=OuterRef("organization__post__id")))
+        )
+        extra = self.filter(Q(post__published=False) | ~Exists(expected))
+        stale = self.filter(Exists(expected), post__published=True).exclude(date=F("post__date"))
+        return missing.values_list("user_id", "organization__post__id"), extra, stale
+
+class FeedEntry(Model):
+    """One row per (member, published post), maintained when POST_FEED_MATERIALIZED is on."""
+
+    class Meta:
+        constraints = [UniqueConstraint(name="%(app_label)s_%(class)s_user_post", fields=("user", "post"))]
+        indexes = [Index(name="%(app_label)s_%(class)s_user_date", fields=("user", "-date", "-post"))]
+
+    objects = FeedEntryQuerySet.as_manager()
+
+    user = ForeignKey(User, on_delete=CASCADE, related_name="feed_entries")
+    post = ForeignKey(Post, on_delete=CASCADE, related_name="feed_entries")
+    date = DateTimeField()
+
+
+@receiver(post_save, sender=USER_MODEL)
+def add_required_orgs(*, instance=None, created=False, **kwargs):
+    if not created and not instance.has_changed("grad_year"):
+        return
+    Membership.objects.reconcile_user(instance)
+    instance.reset_tracked_fields()
 
 @receiver(post_save, sender=USER_MODEL)
-def add_required_orgs(*, instance=None, **kwargs):
-    q = Q(required=True) | Q(required_grad_year__isnull=False, required_grad_year=instance.grad_year)
-    orgs = Organization.objects.filter(q)
-    instance.organizations.add(*orgs)
-    remove_orgs = Organization.objects.exclude(required_grad_year__isnull=True)
-    remove_orgs = remove_orgs.exclude(required_grad_year=instance.grad_year)
-    instance.organizations.add(*orgs)
-    instance.organizations.remove(*remove_orgs)
+@receiver(post_delete, sender=USER_MODEL)
+def forget_checked_claims(*, instance, **kwargs):
+    # Other processes notice within JWT_CLAIMS_CHECK_TTL.
+    forget_claims(instance.pk)
+
+
+@receiver(pre_save, sender=Post)
+def render_post_content(*, instance, update_fields=None, **kwargs):
+    # A save(update_fields=...) naming content must also name the content_* fields to store them.
+    if update_fields is None or "content" in update_fields:
+        instance.render_content()
+
 
 @receiver(pre_save, sender=Post)
 def before_send_post_notifications(*, instance, **kwargs):
     try:
-        instance._pre_save_instance = Post.objects.get(pk=instance.pk)
+        instance._pre_save_instance = Post.objects.only("published").get(pk=instance.pk)
     except Post.DoesNotExist:
         instance._pre_save_instance = None
 
@@ -194,20 +686,76 @@ def send_post_notifications(*, instance, created, **kwargs):
     if not instance.published:
         return
 
-    date = datetime.now().strftime("%Y-%m-%d")
-    tokens = instance.organization.memberships.values("user__expo_push_tokens__token")
-    tokens = [token for x in tokens if (token := x["user__expo_push_tokens__token"])]
+    job = NotificationJob.objects.create(post=instance)
+    if settings.NOTIFICATION_DISPATCH_ON_COMMIT:
+        transaction.on_commit(lambda: notifications.get_executor().submit(_dispatch_job, job.pk))
 
-    send_notifications(tokens, instance.title, instance.content[:300], instance.id, date, instance.organization.name)
+
+def _dispatch_job(pk):
+    try:
+        if (job := NotificationJob.claim(pk)) is not None:
+            job.dispatch()
+    finally:
+        connection.close()
 
 
 @receiver(post_save, sender=Organization)
-def add_required_users(*, instance=None, **kwargs):
-    if instance.required:
-        users = get_user_model().objects.all()
-    elif instance.required_grad_year is not None:
-        users = get_user_model().objects.filter(grad_year=instance.required_grad_year)
-    else:
+def add_required_users(*, instance=None, created=False, **kwargs):
+    if not created and not instance.has_changed("required", "required_grad_year"):
+        return
+    Membership.objects.reconcile_organization(instance)
+    instance.reset_tracked_fields()
+
+
+@receiver(post_save, sender=Organization)
+@receiver(post_delete, sender=Organization)
+@receiver(post_save, sender=OrganizationLink)
+@receiver(post_delete, sender=OrganizationLink)
+@receiver(m2m_changed, sender=Organization.advisors.through)
+@receiver(m2m_changed, sender=Organization.admins.through)
+@receiver(post_delete, sender=USER_MODEL)
+def invalidate_org_directory(*, action=None, **kwargs):
+    if action is None or action.startswith("post_"):
+        bump_org_directory_version()
+
+
+@receiver(post_save, sender=USER_MODEL)
+def invalidate_org_directory_for_user(*, instance, update_fields=None, **kwargs):
+    # Advisors and admins are rendered in the directory; skip saves like last_login updates.
+    if update_fields is not None and not {"first_name", "last_name", "type"} & set(update_fields):
+        return
+    if Organization.objects.filter(Q(advisors=instance) | Q(admins=instance)).exists():
+        bump_org_directory_version()
+
+
+@receiver(post_save, sender=Post)
+def sync_post_feed(*, instance, **kwargs):
+    if not settings.POST_FEED_MATERIALIZED:
         return
+    if instance.published:
+        FeedEntry.objects.add_post(instance)
+    else:
+        FeedEntry.objects.remove_post(instance)
+
+
+@receiver(post_save, sender=Membership)
+def add_membership_feed(*, instance, created, **kwargs):
+    if settings.POST_FEED_MATERIALIZED and created:
+        FeedEntry.objects.add_memberships([instance.user_id], [instance.organization_id])
+
 
-    instance.users.add(*users)
+@receiver(post_delete, sender=Membership)
+def remove_membership_feed(*, instance, **kwargs):
+    if settings.POST_FEED_MATERIALIZED:
+        FeedEntry.objects.remove_memberships([instance.user_id], [instance.organization_id])
+
+
+@receiver(m2m_changed, sender=Membership)
+def add_m2m_membership_feed(*, instance, action, reverse, pk_set, **kwargs):
+    # Related manager add() bulk-creates Membership rows without post_save; removals go through post_delete.
+    if not settings.POST_FEED_MATERIALIZED or action != "post_add" or not pk_set:
+        return
+    if reverse:
+        FeedEntry.objects.add_memberships(pk_set, [instance.pk])
+    else:
+        FeedEntry.objects.add_memberships([instance.pk], pk_set)
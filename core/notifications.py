@@ -1,22 +1,133 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
-import markdown
-from bs4 import BeautifulSoup
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from core.rendering import render_markdown
+
+CHUNK_SIZE = 100
+RECEIPT_CHUNK_SIZE = 1000
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_executor = None
+_worker = threading.local()
+
 
 def markdown_to_text(markdown_text):
-    # Convert markdown to HTML
-    html = markdown.markdown(markdown_text)
-    # Strip HTML tags to get plain text
-    soup = BeautifulSoup(html, "html.parser")
-    return soup.get_text()
-
-def send_notifications(tokens, title, body, id, date, orgName):
-    # Convert the markdown body to plain text
-    plain_text_body = markdown_to_text(body)
-    
-    messages = [{"to": token, "title": title, "body": plain_text_body, "id": id, "data": {"date": date, "org": orgName}} for token in tokens]
-
-    for i in range(0, len(messages), 100):
-        r = requests.post("https://exp.host/--/api/v2/push/send", json=messages[i : i + 100])
-
-        if not r.ok:
+    return render_markdown(markdown_text)[1]
+
+
+def get_session():
+    global _session
+    if _session is None:
+        workers = settings.EXPO_PUSH_MAX_WORKERS
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({"Accept": "application/json", "Accept-Encoding": "gzip, deflate"})
+        if settings.EXPO_ACCESS_TOKEN:
+            session.headers["Authorization"] = f"Bearer {settings.EXPO_ACCESS_TOKEN}"
+        _session = session
+    return _session
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.EXPO_PUSH_MAX_WORKERS, thread_name_prefix="expo", initializer=_mark_worker
+        )
+    return _executor
+
+
+def _mark_worker():
+    _worker.active = True
+
+
+def _retry_delay(attempt, response=None):
+    if response is not None and (retry_after := response.headers.get("Retry-After")):
+        try:
+            return float(retry_after)
+        except ValueError:
             pass
+    return settings.EXPO_PUSH_BACKOFF * 2**attempt + random.uniform(0, settings.EXPO_PUSH_BACKOFF)
+
+
+def post(path, payload):
+    """POST to the Expo push API, retrying with backoff on 429/5xx and connection errors."""
+    url = f"{settings.EXPO_PUSH_API_URL}/{path}"
+    session = get_session()
+    attempt = 0
+    while True:
+        try:
+            r = session.post(url, json=payload, timeout=settings.EXPO_PUSH_TIMEOUT)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt >= settings.EXPO_PUSH_RETRIES:
+                raise
+            time.sleep(_retry_delay(attempt))
+        else:
+            if r.status_code not in RETRY_STATUSES or attempt >= settings.EXPO_PUSH_RETRIES:
+                r.raise_for_status()
+                return r.json()
+            time.sleep(_retry_delay(attempt, r))
+        attempt += 1
+
+
+def _chunks(items, size):
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def _map(fn, items):
+    # Jobs already run on the shared executor; waiting there on more of its own tasks could use up
+    # every worker (and HTTP connection), so those send their chunks one after another.
+    if len(items) <= 1 or getattr(_worker, "active", False):
+        return [fn(item) for item in items]
+    return list(get_executor().map(fn, items))
+
+
+def _try_post(path, payload):
+    try:
+        return post(path, payload)
+    except (requests.RequestException, ValueError) as e:
+        return e
+
+
+def send_chunks(messages):
+    """
+    Send messages in chunks of 100, concurrently. Returns a (chunk, result) pair per chunk, where the
+    result is the chunk's Expo tickets, or the exception if it failed, so only those need resending.
+    """
+    chunks = _chunks(messages, CHUNK_SIZE)
+    results = _map(lambda chunk: _try_post("send", chunk), chunks)
+    return [
+        (chunk, result if isinstance(result, Exception) else result["data"])
+        for chunk, result in zip(chunks, results)
+    ]
+
+
+def get_receipts(ticket_ids):
+    """Fetch push receipts in chunks of 1000. Returns a dict of ticket id to receipt."""
+    payloads = [{"ids": ids} for ids in _chunks(list(ticket_ids), RECEIPT_CHUNK_SIZE)]
+    receipts = {}
+    for result in _map(lambda payload: post("getReceipts", payload), payloads):
+        receipts.update(result["data"])
+    return receipts
+
+
+def get_error(ticket_or_receipt):
+    if ticket_or_receipt.get("status") != "error":
+        return None
+    return ticket_or_receipt.get("details", {}).get("error") or "Unknown"
+
+
+def build_messages(tokens, title, body, id, date, orgName):
+    return [
+        {"to": token, "title": title, "body": body, "id": id, "data": {"date": date, "org": orgName}}
+        for token in tokens
+    ]
@@ -0,0 +1,141 @@
+"""
+The PostgreSQL backend plus the connection handling picked with DB_CONN_MODE (see settings):
+
+- CONN_HEALTH_CHECKS: a reused connection is checked with SELECT 1 before the first query of each
+  request and replaced if the server has dropped it, instead of failing that request.
+- POOL: a (min_size, max_size) pair. Closing a connection hands it back to a psycopg2 pool shared by
+  the process's threads, which keeps up to min_size idle connections open for the next request. Once
+  max_size connections are out, connecting waits up to POOL_TIMEOUT seconds for one to come back.
+"""
+
+import threading
+
+import psycopg2.extras
+import psycopg2.pool
+from django.db.backends.postgresql import base
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class Pool:
+    """
+    A ThreadedConnectionPool whose getconn() waits for a connection to be put back, where psycopg2's
+    raises PoolError as soon as max_size connections are out.
+    """
+
+    def __init__(self, min_size, max_size, timeout, **conn_params):
+        self.pool = psycopg2.pool.ThreadedConnectionPool(min_size, max_size, **conn_params)
+        self.slots = threading.BoundedSemaphore(max_size)
+        self.timeout = timeout
+
+    @property
+    def closed(self):
+        return self.pool.closed
+
+    def getconn(self):
+        if not self.slots.acquire(timeout=self.timeout):
+            raise psycopg2.pool.PoolError(f"no connection available within {self.timeout}s")
+        try:
+            return self.pool.getconn()
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def putconn(self, connection, close=False):
+        try:
+            self.pool.putconn(connection, close=close)
+        finally:
+            self.slots.release()
+
+    def closeall(self):
+        self.pool.closeall()
+
+
+def get_pool(alias, conn_params, min_size, max_size, timeout):
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is None or pool.closed:
+            pool = _pools[alias] = Pool(min_size, max_size, timeout, **conn_params)
+        return pool
+
+
+def close_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.closeall()
+        _pools.clear()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    health_check_done = False
+
+    @property
+    def health_checks(self):
+        return self.settings_dict.get("CONN_HEALTH_CHECKS", False)
+
+    def get_new_connection(self, conn_params):
+        if not self.settings_dict.get("POOL"):
+            return super().get_new_connection(conn_params)
+        pool = get_pool(
+            self.alias, conn_params, *self.settings_dict["POOL"], self.settings_dict.get("POOL_TIMEOUT", 30)
+        )
+        connection = pool.getconn()
+        # Idle connections in the pool may have been dropped by the server; the pool only notices
+        # connections that are closed on our side.
+        while self.health_checks and not self._is_alive(connection):
+            pool.putconn(connection, close=True)
+            connection = pool.getconn()
+
+        # As in the base class: self.isolation_level must be known before autocommit is set.
+        options = self.settings_dict["OPTIONS"]
+        try:
+            self.isolation_level = options["isolation_level"]
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        psycopg2.extras.register_default_jsonb(conn_or_curs=connection, loads=lambda x: x)
+        return connection
+
+    def _close(self):
+        if self.connection is not None and self.settings_dict.get("POOL") and self.alias in _pools:
+            with self.wrap_database_errors:
+                # The pool rolls back an open transaction, and discards the connection if it's broken
+                # or the pool already holds min_size idle ones.
+                return _pools[self.alias].putconn(self.connection)
+        return super()._close()
+
+    def connect(self):
+        # A new connection needs no check; set first, as connecting calls ensure_connection().
+        self.health_check_done = True
+        super().connect()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        # Runs when a request starts and finishes; the check itself waits for the first query.
+        self.health_check_done = False
+
+    def ensure_connection(self):
+        if (
+            self.connection is not None
+            and self.health_checks
+            and not self.health_check_done
+            and not self.in_atomic_block
+        ):
+            self.health_check_done = True
+            if not self.is_usable():
+                self.close()
+        super().ensure_connection()
+
+    @staticmethod
+    def _is_alive(connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            if not connection.autocommit:
+                connection.rollback()
+        except psycopg2.Error:
+            return False
+        return True
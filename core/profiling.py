@@ -0,0 +1,121 @@
+"""
+Opt-in request profiling (REQUEST_PROFILING). A record per request, with its wall time, SQL time and
+query counts, is appended to REQUEST_PROFILE_LOG for `manage.py profile_report`, and staff users (or
+everyone, with DEBUG on) get the same numbers in a Server-Timing header. Queries are counted per
+statement, so the report can point at exact duplicates and at statements repeated with different
+parameters, the usual sign of an N+1.
+"""
+
+import cProfile
+import json
+import os
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+# A statement run this many times in one request, whatever its parameters, is reported as repeated.
+REPEAT_THRESHOLD = 3
+SQL_LENGTH = 300
+
+
+class QueryLog:
+    """A database execute wrapper that counts and times every statement."""
+
+    def __init__(self):
+        self.statements = Counter()
+        self.executions = Counter()
+        self.time = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.time += time.perf_counter() - start
+            self.statements[sql] += 1
+            self.executions[sql, repr(params)] += 1
+
+    @property
+    def count(self):
+        return sum(self.statements.values())
+
+    @property
+    def duplicates(self):
+        """Executions of a statement with parameters already seen in this request."""
+        return sum(n - 1 for n in self.executions.values())
+
+    def repeated(self):
+        return {sql[:SQL_LENGTH]: n for sql, n in self.statements.most_common() if n >= REPEAT_THRESHOLD}
+
+
+def route_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "(unresolved)"
+    return match.view_name or match.route
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if settings.REQUEST_PROFILE_LOG:
+            os.makedirs(os.path.dirname(os.path.abspath(settings.REQUEST_PROFILE_LOG)), exist_ok=True)
+
+    def __call__(self, request):
+        queries = QueryLog()
+        profile = cProfile.Profile() if random.random() < settings.REQUEST_PROFILE_SAMPLE_RATE else None
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            if profile is not None:
+                profile.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                if profile is not None:
+                    profile.disable()
+        elapsed = (time.perf_counter() - start) * 1000
+        db = queries.time * 1000
+
+        # Timings and query counts hint at data the client can't see, so only staff get them.
+        if settings.DEBUG or getattr(getattr(request, "user", None), "is_staff", False):
+            response["Server-Timing"] = (
+                f"total;dur={elapsed:.1f}, db;dur={db:.1f}, "
+                f'queries;desc="{queries.count} queries, {queries.duplicates} duplicate"'
+            )
+        route = route_name(request)
+        record = {
+            "time": time.time(),
+            "method": request.method,
+            "route": route,
+            "path": request.path,
+            "status": response.status_code,
+            "ms": round(elapsed, 2),
+            "db_ms": round(db, 2),
+            "queries": queries.count,
+            "duplicates": queries.duplicates,
+            "repeated": queries.repeated(),
+        }
+        if profile is not None:
+            record["profile"] = self.dump(profile, route, elapsed)
+        if settings.REQUEST_PROFILE_LOG:
+            with open(settings.REQUEST_PROFILE_LOG, "a") as log:
+                log.write(json.dumps(record) + "\n")
+        return response
+
+    def dump(self, profile, route, elapsed):
+        os.makedirs(settings.REQUEST_PROFILE_DIR, exist_ok=True)
+        slug = re.sub(r"[^\w.-]+", "_", route)
+        name = f"{time.time():.3f}-{slug}-{elapsed:.0f}ms.prof"
+        path = os.path.join(settings.REQUEST_PROFILE_DIR, name)
+        profile.dump_stats(path)
+        return path
@@ -0,0 +1,52 @@
+import hashlib
+
+from django.utils.text import Truncator
+
+EXCERPT_LENGTH = 300
+SAFE_URL_SCHEMES = {"http", "https", "mailto", "tel"}
+
+
+def content_hash(content):
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def is_safe_url(url):
+    """Whether a link or image URL is relative or uses an allowed scheme (no javascript: and the like)."""
+    # Browsers ignore whitespace and control characters inside a scheme.
+    url = "".join(c for c in url if c > " " and c != "\x7f")
+    scheme, colon, _ = url.partition(":")
+    if not colon or any(c in scheme for c in "/?#"):
+        return True
+    return scheme.lower() in SAFE_URL_SCHEMES
+
+
+def render_markdown(content):
+    """
+    Return the HTML and plain text of a markdown document. Raw HTML in the document is escaped rather
+    than passed through, and links and images with unsafe URLs lose them, since API clients display
+    the HTML as is.
+    """
+    # Imported here: only saving a post or sending a notification needs them, not the average request.
+    import markdown
+    from bs4 import BeautifulSoup
+
+    md = markdown.Markdown()
+    md.preprocessors.deregister("html_block")
+    md.inlinePatterns.deregister("html")
+    html = md.convert(content)
+    soup = BeautifulSoup(html, "html.parser")
+    unsafe = [
+        (tag, attr)
+        for attr in ("href", "src")
+        for tag in soup.find_all(**{attr: True})
+        if not is_safe_url(tag[attr])
+    ]
+    for tag, attr in unsafe:
+        del tag[attr]
+    if unsafe:
+        html = str(soup)
+    return html, soup.get_text()
+
+
+def excerpt(text, length=EXCERPT_LENGTH):
+    return Truncator(" ".join(text.split())).chars(length)
@@ -1,9 +1,262 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 from django.db import transaction
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch, prefetch_related_objects
+from operator import itemgetter
+from types import SimpleNamespace
 from .models import Organization, Post
 from . import models
 
+
+def optimize_queryset(serializer, queryset, extra_fields=()):
+    """
+    Add the select_related/prefetch_related/only() calls needed to render ``serializer``
+    (a ModelSerializer class or instance) without per-row queries. ``extra_fields`` are loaded
+    too, for callers such as paginators that read fields the serializer may not render.
+    """
+    queryset, only = _optimize_queryset(serializer, queryset)
+    if only is not None:
+        queryset = queryset.only(*only, *extra_fields)
+    return queryset
+
+
+def prefetch_for(serializer, instances):
+    """
+    The prefetches optimize_queryset() would add, run on instances that were loaded elsewhere
+    (e.g. request.user). Lookups that are already prefetched are skipped.
+    """
+    queryset, _ = _optimize_queryset(serializer, serializer.Meta.model._default_manager.none())
+    prefetch_related_objects(instances, *queryset._prefetch_related_lookups)
+
+
+def _optimize_queryset(serializer, queryset, prefix=""):
+    if isinstance(serializer, type):
+        serializer = serializer()
+    opts = serializer.Meta.model._meta
+    only = [f"{prefix}{opts.pk.name}"]
+    deferrable = True
+
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == "*":
+            deferrable = deferrable and isinstance(field, serializers.HyperlinkedIdentityField)
+            continue
+        source = field.source.split(".")[0]
+        try:
+            model_field = opts.get_field(source)
+        except FieldDoesNotExist:
+            deferrable = False
+            continue
+
+        child = getattr(field, "child", None)
+        if isinstance(field, serializers.ListSerializer) and isinstance(child, serializers.ModelSerializer):
+            child_qs, child_only = _optimize_queryset(child, child.Meta.model._default_manager.all())
+            if not child_qs.ordered:
+                # A stable order, which ValuesPlan reproduces.
+                child_qs = child_qs.order_by("pk")
+            if child_only is not None:
+                if model_field.one_to_many:
+                    child_only.append(model_field.field.name)
+                child_qs = child_qs.only(*child_only)
+            queryset = queryset.prefetch_related(Prefetch(f"{prefix}{source}", queryset=child_qs))
+        elif isinstance(field, serializers.ModelSerializer):
+            queryset, nested_only = _optimize_queryset(
+                field, queryset.select_related(f"{prefix}{source}"), prefix=f"{prefix}{source}__"
+            )
+            if nested_only is None:
+                deferrable = False
+            else:
+                only += [f"{prefix}{source}", *nested_only]
+        elif model_field.concrete:
+            only.append(f"{prefix}{model_field.name}")
+        elif model_field.is_relation:
+            queryset = queryset.prefetch_related(f"{prefix}{source}")
+            deferrable = False
+
+    return queryset, only if deferrable else None
+
+
+# Fields whose to_representation() returns database values unchanged.
+PLAIN_FIELDS = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+    serializers.ChoiceField,
+    serializers.ReadOnlyField,
+)
+# Stands in for the lookup value when reversing a hyperlink once per plan.
+URL_SENTINEL = 987654321987654321
+
+
+class NotCompilable(Exception):
+    pass
+
+
+class ValuesPlan:
+    """
+    A read-only ModelSerializer compiled into ``.values()`` lookups. render() turns rows into the
+    same dicts the serializer would produce, without model instances or per-field serializer
+    calls. Nested to-one serializers become joins and nested lists one query per page.
+    Raises NotCompilable for fields it can't reproduce exactly.
+    """
+
+    def __init__(self, serializer, prefix="", pending=None):
+        self.model = serializer.Meta.model
+        opts = self.model._meta
+        self.pk = f"{prefix}{opts.pk.name}"
+        self.lookups = [self.pk]
+        self.getters = []
+        self.many = []
+        self.pending = [] if pending is None else pending
+
+        for field in serializer.fields.values():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.HyperlinkedIdentityField):
+                self.getters.append((field.field_name, self.url_getter(field, prefix)))
+                continue
+            if "." in field.source or field.source == "*":
+                raise NotCompilable(field.field_name)
+            try:
+                model_field = opts.get_field(field.source)
+            except FieldDoesNotExist:
+                raise NotCompilable(field.field_name)
+
+            child = getattr(field, "child", None)
+            if isinstance(field, serializers.ListSerializer) and isinstance(child, serializers.ModelSerializer):
+                self.many.append(self.many_field(field, model_field))
+                self.getters.append((field.field_name, lambda row: None))
+            elif isinstance(field, serializers.ModelSerializer) and model_field.concrete:
+                nested = ValuesPlan(field, f"{prefix}{field.source}__", self.pending)
+                self.lookups += nested.lookups
+                self.getters.append((field.field_name, nested.getter))
+            elif model_field.concrete and not model_field.is_relation:
+                lookup = f"{prefix}{field.source}"
+                self.lookups.append(lookup)
+                self.getters.append((field.field_name, self.column_getter(lookup, field)))
+            else:
+                raise NotCompilable(field.field_name)
+
+    @staticmethod
+    def column_getter(lookup, field):
+        if isinstance(field, PLAIN_FIELDS) and not isinstance(field, serializers.MultipleChoiceField):
+            return itemgetter(lookup)
+        to_representation = field.to_representation
+
+        def get(row):
+            value = row[lookup]
+            return None if value is None else to_representation(value)
+
+        return get
+
+    def url_getter(self, field, prefix):
+        request = field.context.get("request")
+        if request is None:
+            raise NotCompilable(field.field_name)
+        format = field.context.get("format")
+        if format and field.format and field.format != format:
+            format = field.format
+        lookup = self.pk if field.lookup_field == "pk" else f"{prefix}{field.lookup_field}"
+        if lookup not in self.lookups:
+            self.lookups.append(lookup)
+
+        def get_url(value):
+            return field.get_url(SimpleNamespace(**{field.lookup_field: value}), field.view_name, request, format)
+
+        parts = get_url(URL_SENTINEL).split(str(URL_SENTINEL))
+        if len(parts) == 2:
+            start, end = parts
+            return lambda row: f"{start}{row[lookup]}{end}"
+        return lambda row: get_url(row[lookup])
+
+    def many_field(self, field, model_field):
+        if not (model_field.many_to_many or model_field.one_to_many):
+            raise NotCompilable(field.field_name)
+        child = ValuesPlan(field.child, f"{field.source}__", self.pending)
+        ordering = []
+        for name in field.child.Meta.model._meta.ordering or ("pk",):
+            if not isinstance(name, str):
+                raise NotCompilable(field.field_name)
+            desc = name.startswith("-")
+            ordering.append(f"{'-' if desc else ''}{field.source}__{name.lstrip('-')}")
+        return field.field_name, child, ordering
+
+    def getter(self, row):
+        return None if row[self.pk] is None else self.build(row)
+
+    def build(self, row):
+        obj = {name: get(row) for name, get in self.getters}
+        if self.many:
+            self.pending.append((self, row[self.pk], obj))
+        return obj
+
+    def queryset(self, queryset, *extra):
+        return queryset.values(*self.lookups, *extra)
+
+    def render(self, rows):
+        data = [self.build(row) for row in rows]
+        while self.pending:
+            targets = {}
+            for plan, pk, obj in self.pending:
+                targets.setdefault(plan, {}).setdefault(pk, []).append(obj)
+            self.pending.clear()
+            for plan, objs in targets.items():
+                plan.fill_many(objs)
+        return data
+
+    def fill_many(self, objs):
+        pk = self.model._meta.pk.name
+        queryset = self.model._default_manager.filter(pk__in=list(objs))
+        for name, child, ordering in self.many:
+            groups = {}
+            for row in queryset.values(pk, *child.lookups).order_by(*ordering):
+                if row[child.pk] is not None:
+                    groups.setdefault(row[pk], []).append(child.build(row))
+            for key, targets in objs.items():
+                for obj in targets:
+                    obj[name] = list(groups.get(key, ()))
+
+
+def compile_values_plan(serializer):
+    """Return a ValuesPlan for ``serializer``, or None if it needs the regular serializer path."""
+    try:
+        return ValuesPlan(serializer)
+    except NotCompilable:
+        return None
+
+
+def _list_param(request, name):
+    return [part.strip() for part in request.query_params.get(name, "").split(",") if part.strip()]
+
+
+class SparseFieldsMixin:
+    """
+    Lets clients ask for less with ``?fields=a,b`` or ``?omit=a,b``. Fields in ``optional_fields``
+    are only rendered when named in ``?include=`` (or ``?fields=``). Applies to the serializer a view
+    builds, not to nested ones; optimize_queryset() then loads only the remaining columns.
+    """
+
+    optional_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None:
+            return
+        only = set(_list_param(request, "fields"))
+        omit = set(_list_param(request, "omit"))
+        include = set(_list_param(request, "include")) | only
+        for name in list(self.fields):
+            if (
+                (only and name not in only)
+                or name in omit
+                or (name in self.optional_fields and name not in include)
+            ):
+                self.fields.pop(name)
+
+
 # Nested
 
 class NestedUserSerializer(serializers.ModelSerializer):
@@ -26,7 +279,7 @@ class NestedMembershipSerializer(serializers.ModelSerializer):
 
 #Main
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = get_user_model()
         fields = (
@@ -50,13 +303,19 @@ class UserSerializer(serializers.ModelSerializer):
 
     memberships = NestedMembershipSerializer(many=True, read_only=True)
 
+    def to_representation(self, instance):
+        # djoser's users/me/ renders request.user, which no view queryset got to prefetch.
+        if self.parent is None:
+            prefetch_for(self, [instance])
+        return super().to_representation(instance)
+
 class OrganizationLinkSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.OrganizationLink
         fields = ("title", "url")
 
 
-class OrganizationSerializer(serializers.ModelSerializer):
+class OrganizationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = models.Organization
         fields = ("id", "url", "name", "type", "advisors", "admins", "day", "time", "location", "description",)
@@ -89,10 +348,33 @@ class ExpoPushTokenSerializer(serializers.ModelSerializer):
         return obj
 
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
 
         model = models.Post
-        fields = ("id", "url", "organization", "title", "date", "content", "published")
+        fields = (
+            "id",
+            "url",
+            "organization",
+            "title",
+            "date",
+            "content",
+            "published",
+            "content_html",
+            "content_excerpt",
+        )
+
+    optional_fields = ("content_html", "content_excerpt")
+
+    organization = NestedOrganizationSerializer(read_only=True)
+
+
+class PostSummarySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """The feed's view of a post: no markdown body, just the plain-text excerpt as a preview."""
+
+    class Meta:
+        model = models.Post
+        fields = ("id", "organization", "title", "date", "published", "preview")
 
     organization = NestedOrganizationSerializer(read_only=True)
+    preview = serializers.CharField(source="content_excerpt", read_only=True)
@@ -0,0 +1,60 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Organization, OrganizationType, Post, User
+
+
+class AdminQueriesTests(TestCase):
+    """The Post admin loads a user's org permissions once per request, not once per row or form field."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create(email="advisor@example.com", is_staff=True)
+        cls.superuser = User.objects.create(email="super@example.com", is_staff=True, is_superuser=True)
+        cls.orgs = Organization.objects.bulk_create(
+            Organization(name=f"Club {i}", type=OrganizationType.CLUB) for i in range(4)
+        )
+        cls.orgs[0].admins.add(cls.staff)
+        cls.orgs[1].advisors.add(cls.staff)
+        Post.objects.bulk_create(
+            Post(organization=cls.orgs[i % 4], title=f"Post {i}", content="Hello", published=True)
+            for i in range(40)
+        )
+        cls.post = Post.objects.filter(organization=cls.orgs[0]).first()
+
+    def count(self, user, url):
+        self.client.force_login(user)
+        # Warm up per-process caches, such as content types.
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assertFixedQueries(self, url, per_org=10):
+        counts = {user.email: self.count(user, url) for user in (self.staff, self.superuser)}
+        # Adding rows to every page must not change the number of queries.
+        Post.objects.bulk_create(
+            Post(organization=org, title="More", content="Hello", published=True)
+            for org in self.orgs
+            for _ in range(per_org)
+        )
+        self.assertEqual({user.email: self.count(user, url) for user in (self.staff, self.superuser)}, counts)
+        return counts
+
+    def test_post_changelist(self):
+        # From 20 and 40 rows to a full page of 100 for both; the advisor sees two of the four orgs.
+        counts = self.assertFixedQueries("/admin/core/post/", per_org=40)
+        self.assertLessEqual(max(counts.values()), 12)
+        for user in (self.staff, self.superuser):
+            self.client.force_login(user)
+            self.assertEqual(len(self.client.get("/admin/core/post/").context["cl"].result_list), 100)
+
+    def test_post_change(self):
+        counts = self.assertFixedQueries(f"/admin/core/post/{self.post.pk}/change/")
+        self.assertLessEqual(max(counts.values()), 12)
+
+    def test_organization_change(self):
+        counts = self.assertFixedQueries(f"/admin/core/organization/{self.orgs[0].pk}/change/")
+        self.assertLessEqual(max(counts.values()), 12)
@@ -0,0 +1,63 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.authentication import ClaimsRefreshToken, claims_user, claims_version
+from core.cache import forget_claims
+from core.models import User, UserType
+
+
+@override_settings(JWT_CLAIMS_CHECK_TTL=60)
+class ClaimsAuthenticationTests(TestCase):
+    """Users built from token claims serve reads, but never write the token's values back."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            email="student@example.com", type=UserType.STUDENT, grad_year=2027, is_superuser=True
+        )
+
+    def setUp(self):
+        forget_claims(self.user.pk)
+        self.token = ClaimsRefreshToken.for_user(self.user).access_token
+        self.headers = {"HTTP_AUTHORIZATION": f"Bearer {self.token}"}
+        # Loads the user and records the claims check.
+        self.assertEqual(self.client.get("/api/users/me/", **self.headers).status_code, 200)
+
+    def test_reads_skip_the_user_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/posts/", **self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([query for query in queries if 'FROM "core_user"' in query["sql"]])
+
+    def test_write_keeps_changes_made_elsewhere(self):
+        # Demoted by another process: no post_save here, so this one still trusts the claims.
+        User.objects.filter(pk=self.user.pk).update(is_superuser=False, is_staff=True)
+        response = self.client.put(
+            "/api/users/me/", {"grad_year": 2028}, content_type="application/json", **self.headers
+        )
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.grad_year, 2028)
+        self.assertFalse(self.user.is_superuser)
+        self.assertTrue(self.user.is_staff)
+
+    def test_claims_user_cannot_be_saved(self):
+        user = claims_user(self.token)
+        with self.assertRaises(ValueError):
+            user.save()
+        # Loading a deferred field doesn't replace the token's values, so it still can't be saved.
+        self.assertEqual(user.email, self.user.email)
+        with self.assertRaises(ValueError):
+            user.save()
+        user.refresh_from_db()
+        user.save()
+
+    def test_deactivation_changes_version(self):
+        version = claims_version(self.user)
+        self.user.is_active = False
+        self.assertNotEqual(claims_version(self.user), version)
+
+    def test_version_ignores_how_type_was_set(self):
+        # Created with a UserType member; loaded with a plain int.
+        self.assertEqual(claims_version(self.user), claims_version(User.objects.get(pk=self.user.pk)))
@@ -0,0 +1,64 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+from core.models import FeedEntry, Membership, Organization, OrganizationType, Post, User, UserType
+
+
+@override_settings(POST_FEED_MATERIALIZED=True)
+class CheckFeedsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(email="student@example.com", type=UserType.STUDENT)
+        cls.other = User.objects.create(email="other@example.com", type=UserType.STUDENT)
+        cls.org = Organization.objects.create(name="Club", type=OrganizationType.CLUB)
+        Membership.objects.create(user=cls.user, organization=cls.org)
+        Membership.objects.create(user=cls.other, organization=cls.org)
+        cls.posts = [
+            Post.objects.create(organization=cls.org, title=f"Post {i}", content="Hello", published=True)
+            for i in range(3)
+        ]
+
+    def check_feeds(self, *args):
+        out = StringIO()
+        call_command("check_feeds", *args, stdout=out)
+        return out.getvalue()
+
+    def diff(self):
+        missing, extra, stale = FeedEntry.objects.diff()
+        return (
+            set(missing),
+            set(extra.values_list("user_id", "post_id")),
+            set(stale.values_list("id", flat=True)),
+        )
+
+    def test_consistent(self):
+        self.assertEqual(self.diff(), (set(), set(), set()))
+        self.assertIn("Missing: 0, extra: 0, stale: 0", self.check_feeds())
+
+    def test_inconsistent(self):
+        missing = FeedEntry.objects.get(user=self.user, post=self.posts[0])
+        missing.delete()
+        stale = FeedEntry.objects.filter(user=self.other, post=self.posts[1])
+        stale.update(date=self.posts[0].date.replace(year=2000))
+        Post.objects.filter(pk=self.posts[2].pk).update(published=False)
+
+        self.assertEqual(
+            self.diff(),
+            (
+                {(self.user.id, self.posts[0].id)},
+                {(self.user.id, self.posts[2].id), (self.other.id, self.posts[2].id)},
+                {stale.get().id},
+            ),
+        )
+        with self.assertRaisesMessage(CommandError, "Feeds of 2 user(s) are inconsistent"):
+            self.check_feeds()
+
+        self.assertIn("Rebuilt feeds of 2 user(s)", self.check_feeds("--fix"))
+        self.assertEqual(self.diff(), (set(), set(), set()))
+
+    @override_settings(POST_FEED_MATERIALIZED=False)
+    def test_not_materialized(self):
+        with self.assertRaisesMessage(CommandError, "POST_FEED_MATERIALIZED is off"):
+            self.check_feeds()
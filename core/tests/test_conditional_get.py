@@ -0,0 +1,51 @@
+from django.test import TestCase, override_settings
+
+from core.models import Membership, Organization, OrganizationType, Post, User, UserType
+
+
+@override_settings(ORG_CACHE_SHARED=True)
+class PostConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(email="student@example.com", type=UserType.STUDENT)
+        cls.org = Organization.objects.create(name="Club", type=OrganizationType.CLUB)
+        Membership.objects.create(user=cls.user, organization=cls.org)
+        cls.posts = [
+            Post.objects.create(organization=cls.org, title=f"Post {i}", content="Hello", published=True)
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_keyset_etag(self):
+        response = self.client.get("/api/posts/?cursor=")
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get("/api/posts/?cursor=", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_keyset_etag_after_delete(self):
+        etag = self.client.get("/api/posts/?cursor=")["ETag"]
+        self.posts[0].delete()
+        response = self.client.get("/api/posts/?cursor=", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 2)
+
+    def test_keyset_etag_after_org_rename(self):
+        # Posts nest their org's name.
+        etag = self.client.get("/api/posts/?cursor=")["ETag"]
+        self.org.name = "Renamed Club"
+        self.org.save()
+        response = self.client.get("/api/posts/?cursor=", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_page_numbers_skip_validators(self):
+        # Their validator would cost another pass over the whole feed.
+        with self.assertNumQueries(4):
+            response = self.client.get("/api/posts/?page=1")
+        self.assertNotIn("ETag", response)
+
+    @override_settings(ORG_CACHE_SHARED=False)
+    def test_no_etag_without_shared_cache(self):
+        self.assertNotIn("ETag", self.client.get("/api/posts/?cursor="))
+        self.assertNotIn("ETag", self.client.get("/api/users/me/"))
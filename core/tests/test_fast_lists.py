@@ -0,0 +1,91 @@
+import difflib
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from core.cache import get_org_cache
+from core.models import DayOfWeek, Organization, OrganizationType, Post, User, UserType
+from core.renderers import FastJSONRenderer
+
+# Strings that exercise escaping: quotes, control characters, non-ASCII and JS line separators.
+AWKWARD = 'Café \U0001f389 "quoted" back\\slash\ttab\nnewline \u2028 \u2029 \x1f \x7f </script>'
+URLS = (
+    "/api/posts/",
+    "/api/posts/?cursor=",
+    "/api/posts/?view=summary",
+    "/api/posts/?cursor=&fields=id,title,organization",
+    "/api/posts/?omit=content&include=content_html,content_excerpt",
+    "/api/posts/?page=2&fields=id,url",
+    "/api/orgs/",
+    "/api/orgs/?page=2",
+    "/api/orgs/?omit=advisors,admins",
+    "/api/orgs/?user",
+    "/api/users/me/orgs/",
+    "/api/users/me/orgs/?fields=organization",
+)
+
+
+class FastListTests(TestCase):
+    """FAST_LIST_SERIALIZATION returns byte-for-byte the same list responses as the regular serializers."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(email="student@example.com", first_name=AWKWARD, type=UserType.STUDENT)
+        staff = [
+            User.objects.create(email=f"staff{i}@example.com", first_name=f"Staff {i}", type=UserType.STAFF)
+            for i in range(4)
+        ]
+        for i in range(30):
+            org = Organization.objects.create(
+                name=f"Club {i:02} {AWKWARD if i == 3 else ''}",
+                type=OrganizationType.CLUB if i % 3 else OrganizationType.CLASS,
+                required_grad_year=None if i % 3 else 2030 + i,
+                day=DayOfWeek.MONDAY if i % 2 else None,
+                time="3:30 PM" if i % 2 else None,
+                location="Room 204" if i % 4 else None,
+                description=AWKWARD if i % 5 == 0 else "",
+            )
+            org.advisors.add(*staff[: i % 3])
+            org.admins.add(*staff[i % 4 :])
+            if i % 2:
+                org.users.add(cls.user)
+            for j in range(3):
+                Post.objects.create(
+                    organization=org,
+                    title=f"Post {i}.{j}",
+                    content=f"# Heading\n\n**{AWKWARD}**",
+                    published=j != 1,
+                )
+        # Identical dates, so the keyset tie-break on id matters.
+        Post.objects.filter(organization__name__startswith="Club 1").update(
+            date=timezone.now() - timedelta(days=1)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def fetch(self, url, fast):
+        get_org_cache().clear()
+        with override_settings(FAST_LIST_SERIALIZATION=fast):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_same_responses(self):
+        for url in URLS:
+            with self.subTest(url=url):
+                regular, fast = self.fetch(url, False), self.fetch(url, True)
+                diff = difflib.unified_diff(
+                    regular.replace(",", ",\n").splitlines(),
+                    fast.replace(",", ",\n").splitlines(),
+                    "regular",
+                    "fast",
+                    lineterm="",
+                )
+                self.assertEqual(regular, fast, "\n".join(diff))
+
+    def test_same_json(self):
+        data = {"text": AWKWARD + "\x00", "date": timezone.now(), "list": [1, None, True, 1.5], 7: "int key"}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
@@ -0,0 +1,56 @@
+import io
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.models import Organization, User
+
+
+class ImportOrgsTests(TestCase):
+    def import_csv(self, text):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "clubs.csv")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+            out, err = io.StringIO(), io.StringIO()
+            call_command("import_orgs", path, batch_size=2, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_import(self):
+        advisor = User.objects.create(email="advisor@example.com")
+        out, err = self.import_csv(
+            "Club,Advisors,Links,Day\n"
+            "Robotics,advisor@example.com,Site|https://example.com,Monday\n"
+            "Chess,,,Friday\n"
+        )
+        self.assertEqual(err, "")
+        self.assertIn("Created 2, updated 0, unchanged 0, skipped 0", out)
+        robotics = Organization.objects.get(name="Robotics")
+        self.assertEqual(list(robotics.advisors.all()), [advisor])
+        self.assertEqual(list(robotics.links.values_list("title", "url")), [("Site", "https://example.com")])
+
+    def test_duplicate_names(self):
+        # The first and second Robotics rows are in one batch, the third in the next.
+        out, err = self.import_csv(
+            "Club,Location\nRobotics,Room 1\nRobotics,Room 2\nChess,Gym\nRobotics,Room 3\n"
+        )
+        self.assertIn("Created 2, updated 0, unchanged 0, skipped 2", out)
+        self.assertIn("Line 3: Duplicate club 'Robotics', first on line 2", err)
+        self.assertIn("Line 5: Duplicate club 'Robotics', first on line 2", err)
+        self.assertEqual(Organization.objects.get(name="Robotics").location, "Room 1")
+
+    def test_reimport_clears_relations(self):
+        advisor = User.objects.create(email="advisor@example.com")
+        self.import_csv(
+            "Club,Advisors,Admins,Links\n"
+            "Robotics,advisor@example.com,advisor@example.com,Site|https://example.com\n"
+        )
+        # An empty column clears the relation; a missing one (Admins) leaves it alone.
+        out, err = self.import_csv("Club,Advisors,Links\nRobotics,,\n")
+        self.assertEqual(err, "")
+        robotics = Organization.objects.get(name="Robotics")
+        self.assertEqual(list(robotics.advisors.all()), [])
+        self.assertEqual(list(robotics.links.all()), [])
+        self.assertEqual(list(robotics.admins.all()), [advisor])
@@ -0,0 +1,33 @@
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core import notifications
+
+
+class SendChunksTests(SimpleTestCase):
+    """Chunks go out on the shared executor, except from its own workers, which send them in turn."""
+
+    def setUp(self):
+        self.threads = []
+
+        def post(path, payload):
+            self.threads.append(threading.current_thread())
+            return {"data": [{"status": "ok"} for _ in payload]}
+
+        patcher = mock.patch.object(notifications, "post", post)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.messages = [{"to": f"ExponentPushToken[{i}]"} for i in range(250)]
+
+    def test_concurrent_from_outside(self):
+        results = notifications.send_chunks(self.messages)
+        self.assertEqual([len(tickets) for _, tickets in results], [100, 100, 50])
+        self.assertNotIn(threading.current_thread(), self.threads)
+
+    def test_inline_on_a_worker(self):
+        results = notifications.get_executor().submit(notifications.send_chunks, self.messages).result()
+        self.assertEqual(len(results), 3)
+        self.assertEqual(len(set(self.threads)), 1)
+        self.assertTrue(self.threads[0].name.startswith("expo"))
@@ -0,0 +1,56 @@
+from django.test import TestCase, override_settings
+
+from core.cache import get_org_cache
+from core.models import Organization, OrganizationType, User, UserType
+
+
+class OrganizationQueriesTests(TestCase):
+    """The org endpoints load nested advisors and admins with a fixed number of queries, however many orgs."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(email="student@example.com", type=UserType.STUDENT)
+        staff = [User.objects.create(email=f"staff{i}@example.com", type=UserType.STAFF) for i in range(3)]
+        cls.orgs = Organization.objects.bulk_create(
+            Organization(name=f"Club {i:02}", type=OrganizationType.CLUB) for i in range(20)
+        )
+        for org in cls.orgs:
+            org.advisors.add(*staff[:2])
+            org.admins.add(*staff[1:])
+
+    def setUp(self):
+        get_org_cache().clear()
+        self.client.force_login(self.user)
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_list(self):
+        # Session, user, count, orgs, advisors, admins.
+        with self.assertNumQueries(6):
+            page = self.get("/api/orgs/")
+        self.assertEqual(len(page["results"]), 20)
+        self.assertEqual([len(org["advisors"]) for org in page["results"]], [2] * 20)
+        self.assertEqual([len(org["admins"]) for org in page["results"]], [2] * 20)
+
+    @override_settings(FAST_LIST_SERIALIZATION=True)
+    def test_fast_list(self):
+        with self.assertNumQueries(6):
+            page = self.get("/api/orgs/")
+        self.assertEqual([len(org["admins"]) for org in page["results"]], [2] * 20)
+
+    def test_detail(self):
+        # Session, user, org, advisors, admins.
+        with self.assertNumQueries(5):
+            org = self.get(f"/api/orgs/{self.orgs[0].pk}/")
+        self.assertEqual(org["name"], "Club 00")
+        self.assertEqual(len(org["advisors"]), 2)
+
+    @override_settings(ORG_CACHE_TIMEOUT=60)
+    def test_cached_list(self):
+        self.get("/api/orgs/")
+        # Only the session and user; the page comes from the org directory cache.
+        with self.assertNumQueries(2):
+            self.get("/api/orgs/")
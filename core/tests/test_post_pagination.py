@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import Membership, Organization, OrganizationType, Post, User, UserType
+
+
+class PostPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(email="student@example.com", type=UserType.STUDENT)
+        org = Organization.objects.create(name="Club", type=OrganizationType.CLUB)
+        Membership.objects.create(user=cls.user, organization=org)
+        Post.objects.bulk_create(
+            Post(organization=org, title=f"Post {i}", content="Hello", published=True) for i in range(25)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_page_numbers_by_default(self):
+        page = self.get("/api/posts/")
+        self.assertEqual(page["count"], 25)
+        self.assertEqual(len(page["results"]), 20)
+        self.assertTrue(page["next"].endswith("/api/posts/?page=2"))
+
+    def test_keyset_pages(self):
+        page = self.get("/api/posts/?cursor=")
+        self.assertNotIn("count", page)
+        self.assertIsNone(page["previous"])
+        ids = [post["id"] for post in page["results"]]
+
+        page = self.get(page["next"])
+        self.assertIsNone(page["next"])
+        ids += [post["id"] for post in page["results"]]
+        self.assertEqual(ids, list(Post.objects.order_by("-date", "-pk").values_list("pk", flat=True)))
+
+        page = self.get(page["previous"])
+        self.assertEqual(len(page["results"]), 20)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get("/api/posts/?cursor=nonsense").status_code, 404)
+
+
+class FeedPagesTests(TestCase):
+    """Pages read from each org's own rows hold the same posts as the feed's overall order."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(email="student@example.com", type=UserType.STUDENT)
+        orgs = Organization.objects.bulk_create(
+            Organization(name=f"Club {i}", type=OrganizationType.CLUB) for i in range(3)
+        )
+        Membership.objects.bulk_create(Membership(user=cls.user, organization=org) for org in orgs[:2])
+        # The org the user isn't in posts most, and most recently.
+        posts = Post.objects.bulk_create(
+            Post(organization=orgs[i % 5 // 2], title=f"Post {i}", content="Hello", published=True)
+            for i in range(120)
+        )
+        now = timezone.now()
+        for i, post in enumerate(posts):
+            Post.objects.filter(pk=post.pk).update(date=now - timedelta(minutes=i % 7, seconds=i))
+        cls.expected = list(
+            Post.objects.filter(organization__in=orgs[:2], published=True)
+            .order_by("-date", "-pk")
+            .values_list("pk", flat=True)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def walk(self, url):
+        ids = []
+        while url:
+            page = self.client.get(url).json()
+            ids += [post["id"] for post in page["results"]]
+            url = page["next"]
+        return ids
+
+    def test_pages(self):
+        for fast in (False, True):
+            with self.subTest(fast=fast), override_settings(FAST_LIST_SERIALIZATION=fast):
+                self.assertEqual(self.walk("/api/posts/?cursor="), self.expected)
+                self.assertEqual(self.walk("/api/posts/"), self.expected)
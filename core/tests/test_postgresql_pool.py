@@ -0,0 +1,32 @@
+import threading
+
+import psycopg2.pool
+from django.db import connection
+from django.test import TestCase
+
+from core.postgresql.base import Pool
+
+
+class PoolTests(TestCase):
+    """Once max_size connections are out, getconn() waits for one to come back instead of failing."""
+
+    def setUp(self):
+        self.pool = Pool(1, 1, 5, **connection.get_connection_params())
+        self.addCleanup(self.pool.closeall)
+
+    def test_waits_for_a_connection(self):
+        first = self.pool.getconn()
+        timer = threading.Timer(0.1, self.pool.putconn, [first])
+        timer.start()
+        self.addCleanup(timer.join)
+        second = self.pool.getconn()
+        self.assertIs(second, first)
+        self.pool.putconn(second)
+
+    def test_times_out(self):
+        self.pool.timeout = 0.05
+        first = self.pool.getconn()
+        with self.assertRaises(psycopg2.pool.PoolError):
+            self.pool.getconn()
+        self.pool.putconn(first)
+        self.pool.putconn(self.pool.getconn())
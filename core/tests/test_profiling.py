@@ -0,0 +1,40 @@
+import json
+import os
+import tempfile
+
+from django.test import TestCase, override_settings
+
+from core.models import User, UserType
+
+
+class ProfilingMiddlewareTests(TestCase):
+    """Every request is logged, but only staff (or everyone with DEBUG on) see Server-Timing."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create(email="student@example.com", type=UserType.STUDENT)
+        cls.staff = User.objects.create(email="staff@example.com", type=UserType.STAFF, is_staff=True)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.log = os.path.join(directory.name, "profiles", "requests.jsonl")
+        settings = override_settings(REQUEST_PROFILING=True, REQUEST_PROFILE_LOG=self.log)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def get_as(self, user):
+        self.client.force_login(user)
+        return self.client.get("/api/users/me/")
+
+    def test_staff_get_server_timing(self):
+        self.assertIn("queries;desc=", self.get_as(self.staff)["Server-Timing"])
+
+    def test_others_do_not(self):
+        self.assertNotIn("Server-Timing", self.get_as(self.student))
+        with open(self.log) as log:
+            self.assertEqual(json.loads(log.readline())["status"], 200)
+
+    @override_settings(DEBUG=True)
+    def test_everyone_gets_it_with_debug(self):
+        self.assertIn("Server-Timing", self.get_as(self.student))
@@ -0,0 +1,167 @@
+import json
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import (
+    ExpoPushToken,
+    FeedEntry,
+    Membership,
+    Organization,
+    OrganizationType,
+    Post,
+    User,
+    UserType,
+)
+
+
+def foreign_key_index(model, name):
+    """The name Django gives the index on a foreign key's column."""
+    field = model._meta.get_field(name)
+    return connection.schema_editor()._create_index_name(model._meta.db_table, [field.column], suffix="")
+
+
+def index_exists(name):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_indexes WHERE indexname = %s", [name])
+        return cursor.fetchone() is not None
+
+
+def explain(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    return json.loads(plan) if isinstance(plan, str) else plan
+
+
+def index_names(node):
+    if isinstance(node, dict):
+        if "Index Name" in node:
+            yield node["Index Name"]
+        for value in node.values():
+            yield from index_names(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from index_names(value)
+
+
+@skipUnless(connection.vendor == "postgresql", "Query plans are checked on PostgreSQL.")
+class QueryPlanTests(TestCase):
+    """
+    The main query behind each hot path uses the index meant for it. The fixture is a small school
+    with uneven clubs and some drafts, analyzed so the planner sees its real selectivity; sequential
+    scans are disabled because they win on any table this small.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.global_org = Organization.objects.create(
+            name="Fremont", type=OrganizationType.GLOBAL, required=True
+        )
+        classes = [
+            Organization.objects.create(
+                name=f"Class of {year}", type=OrganizationType.CLASS, required_grad_year=year
+            )
+            for year in range(2026, 2030)
+        ]
+        cls.clubs = Organization.objects.bulk_create(
+            Organization(name=f"Club {i:02}", type=OrganizationType.CLUB) for i in range(40)
+        )
+        students = User.objects.bulk_create(
+            User(email=f"student{i}@example.com", type=UserType.STUDENT, grad_year=2026 + i % 4)
+            for i in range(400)
+        )
+        cls.student = students[0]
+        Membership.objects.bulk_create(
+            Membership(user=student, organization=org)
+            for i, student in enumerate(students)
+            for org in [cls.global_org, classes[i % 4], *(cls.clubs[(i + k * 7) % 40] for k in range(3))]
+        )
+        ExpoPushToken.objects.bulk_create(
+            ExpoPushToken(user=student, token=f"ExponentPushToken[{i:022}]")
+            for i, student in enumerate(students)
+        )
+        # Club i has 5 + 10 * i posts, every tenth a draft; the school-wide org has 1000.
+        counts = [(cls.global_org, 1000), *((club, 5 + 10 * i) for i, club in enumerate(cls.clubs))]
+        Post.objects.bulk_create(
+            Post(
+                organization=org,
+                title=f"Post {n}",
+                content="Hello",
+                published=n % 10 != 0,
+                date=now - timedelta(hours=n),
+            )
+            for org, count in counts
+            for n in range(count)
+        )
+        FeedEntry.objects.rebuild(user_ids=[cls.student.id])
+        with connection.cursor() as cursor:
+            for model in (Organization, User, Membership, Post, FeedEntry, ExpoPushToken):
+                cursor.execute(f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}")
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+        self.addCleanup(self.reset_seqscan)
+
+    def reset_seqscan(self):
+        with connection.cursor() as cursor:
+            cursor.execute("RESET enable_seqscan")
+
+    def assertUsesIndex(self, queryset, expected):
+        used = set(index_names(explain(queryset)))
+        self.assertTrue(used & expected, f"Expected one of {sorted(expected)}, used {sorted(used) or 'none'}")
+
+    def posts(self):
+        return Post.objects.filter(published=True).order_by("-date", "-pk")
+
+    def test_post_feed(self):
+        orgs = Membership.objects.filter(user=self.student).values("organization_id")
+        self.assertUsesIndex(
+            self.posts().filter(organization__in=orgs)[:21],
+            {"core_post_published_date_id", "core_post_org_date"},
+        )
+
+    def test_org_posts(self):
+        for org in (self.clubs[0], self.clubs[-1], self.global_org):
+            with self.subTest(org=org.name):
+                self.assertUsesIndex(self.posts().filter(organization=org)[:21], {"core_post_org_date"})
+
+    def test_materialized_feed(self):
+        entries = FeedEntry.objects.filter(user=self.student).order_by("-date", "-post")[:21]
+        self.assertUsesIndex(entries, {"core_feedentry_user_date"})
+
+    def test_org_directory(self):
+        self.assertUsesIndex(
+            Organization.objects.order_by("type", "name")[:25], {"core_organization_type_name"}
+        )
+
+    def test_org_search(self):
+        self.assertUsesIndex(Organization.objects.search("club"), {"core_organization_search"})
+
+    def test_required_orgs(self):
+        orgs = Organization.objects.filter(required_grad_year=self.student.grad_year)
+        self.assertUsesIndex(orgs, {"core_organization_grad_year"})
+
+    def test_class_members(self):
+        self.assertUsesIndex(User.objects.filter(grad_year=self.student.grad_year), {"core_user_grad_year"})
+
+    def test_token_fan_out(self):
+        tokens = ExpoPushToken.objects.filter(user__memberships__organization=self.clubs[0])
+        self.assertUsesIndex(tokens, {foreign_key_index(Membership, "organization")})
+
+    def test_admin_search(self):
+        searches = [
+            (User.objects.filter(email__icontains="student1"), "core_user_email_trgm"),
+            (ExpoPushToken.objects.filter(token__icontains="0042"), "core_expopushtoken_token_trgm"),
+        ]
+        for queryset, index in searches:
+            with self.subTest(index=index):
+                if not index_exists(index):
+                    self.skipTest("pg_trgm is not available, so the trigram indexes were not created.")
+                self.assertUsesIndex(queryset, {index})
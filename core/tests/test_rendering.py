@@ -0,0 +1,31 @@
+from django.test import SimpleTestCase
+
+from core.rendering import render_markdown
+
+
+class RenderMarkdownTests(SimpleTestCase):
+    def test_markdown(self):
+        html, text = render_markdown("**Robotics** meets [here](https://example.com).")
+        self.assertEqual(
+            html, '<p><strong>Robotics</strong> meets <a href="https://example.com">here</a>.</p>'
+        )
+        self.assertEqual(text, "Robotics meets here.")
+
+    def test_raw_html_is_escaped(self):
+        html, text = render_markdown('<div onclick="steal()">Hi</div>\n\nHi <script>alert(1)</script>')
+        self.assertNotIn("<div", html)
+        self.assertNotIn("<script", html)
+        self.assertIn("&lt;script&gt;alert(1)&lt;/script&gt;", html)
+        self.assertIn("<script>alert(1)</script>", text)
+
+    def test_unsafe_urls_are_dropped(self):
+        for url in ("javascript:alert(1)", "JaVa&#x09;Script:alert(1)", "vbscript:x", "data:text/html,x"):
+            with self.subTest(url=url):
+                html, _ = render_markdown(f"[link]({url}) ![image]({url})")
+                self.assertEqual(html, '<p><a>link</a> <img alt="image"/></p>')
+
+    def test_safe_urls_are_kept(self):
+        for url in ("https://example.com/a?b=c:d", "/relative/path", "#anchor", "mailto:club@example.com"):
+            with self.subTest(url=url):
+                html, _ = render_markdown(f"[link]({url})")
+                self.assertIn(f'href="{url}"', html)
@@ -0,0 +1,62 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import Membership, Organization, OrganizationType, Post, User, UserType
+from core.views import SearchView
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(email="student@example.com", type=UserType.STUDENT)
+        cls.club = Organization.objects.create(name="Robotics Club", type=OrganizationType.CLUB)
+        other = Organization.objects.create(name="Chess Club", type=OrganizationType.CLUB)
+        Membership.objects.create(user=cls.user, organization=cls.club)
+        now = timezone.now()
+        cls.posts = {}
+        for title, org, published, age in [
+            ("Robotics robotics robotics", cls.club, True, 3),
+            ("Robotics meeting", cls.club, True, 2),
+            ("Robotics bake sale", cls.club, True, 1),
+            ("Robotics draft", cls.club, False, 0),
+            ("Robotics elsewhere", other, True, 0),
+        ]:
+            post = Post.objects.create(organization=org, title=title, content="Hello", published=published)
+            Post.objects.filter(pk=post.pk).update(date=now - timedelta(days=age))
+            cls.posts[title] = post.pk
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def search(self, q):
+        response = self.client.get("/api/search/", {"q": q})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def post_ids(self, *titles):
+        return [self.posts[title] for title in titles]
+
+    def test_ranked_visible_posts(self):
+        data = self.search("robotics")
+        self.assertEqual([org["name"] for org in data["organizations"]], ["Robotics Club"])
+        self.assertEqual(
+            [post["id"] for post in data["posts"]],
+            self.post_ids("Robotics robotics robotics", "Robotics bake sale", "Robotics meeting"),
+        )
+
+    def test_ranks_most_recent_matches(self):
+        # The oldest post ranks best, but is not among the two most recent matches.
+        with mock.patch.multiple(SearchView, ranked_posts=2, default_limit=2):
+            data = self.search("robotics")
+        self.assertEqual(
+            [post["id"] for post in data["posts"]], self.post_ids("Robotics bake sale", "Robotics meeting")
+        )
+
+    @override_settings(FAST_LIST_SERIALIZATION=True)
+    def test_fast_list(self):
+        fast = self.search("robotics")
+        with self.settings(FAST_LIST_SERIALIZATION=False):
+            self.assertEqual(self.search("robotics"), fast)
@@ -0,0 +1,71 @@
+from django.test import Client, TestCase
+
+from core.cache import get_org_cache
+from core.models import Organization, OrganizationType, User, UserType
+
+SIZES = (1, 10, 100)
+
+
+class UserQueriesTests(TestCase):
+    """The current-user and membership endpoints take the same number of queries for any number of orgs."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {}
+        for size in SIZES:
+            user = User.objects.create(email=f"student{size}@example.com", type=UserType.STUDENT)
+            staff = User.objects.create(email=f"staff{size}@example.com", type=UserType.STAFF)
+            orgs = Organization.objects.bulk_create(
+                Organization(name=f"Club {size} {i}", type=OrganizationType.CLUB) for i in range(size)
+            )
+            for org in orgs:
+                org.advisors.add(staff)
+                org.admins.add(staff)
+            user.organizations.add(*orgs)
+            cls.users[size] = user
+
+    def assertQueriesPerSize(self, expected, method, url, data=None):
+        for size, user in self.users.items():
+            with self.subTest(size=size):
+                get_org_cache().clear()
+                client = Client()
+                client.force_login(user)
+                with self.assertNumQueries(expected):
+                    response = getattr(client, method)(
+                        url, data and {k: v.format(size=size) for k, v in data.items()}
+                    )
+                self.assertIn(response.status_code, (200, 201))
+
+    def test_users_me(self):
+        # Session, user and its memberships.
+        self.assertQueriesPerSize(3, "get", "/api/users/me/")
+
+    def test_djoser_users_me(self):
+        self.assertQueriesPerSize(3, "get", "/api/auth/users/me/")
+
+    def test_memberships(self):
+        # Session, user, count, memberships with their orgs, advisors, admins.
+        self.assertQueriesPerSize(6, "get", "/api/users/me/orgs/")
+
+    def test_tokens(self):
+        for size, user in self.users.items():
+            user.expo_push_tokens.create(token=f"ExponentPushToken[{size}]")
+        # Session, user, count, tokens.
+        self.assertQueriesPerSize(4, "get", "/api/users/me/tokens/")
+
+    def test_add_token(self):
+        self.assertQueriesPerSize(
+            9, "post", "/api/users/me/tokens/", {"token": "ExponentPushToken[new-{size}]"}
+        )
+
+    def test_own_id(self):
+        # The user's own id resolves to request.user like "me" does.
+        user = self.users[10]
+        self.client.force_login(user)
+        with self.assertNumQueries(3):
+            response = self.client.get(f"/api/users/{user.pk}/")
+        self.assertEqual(response.json()["email"], user.email)
+
+    def test_anonymous_nested_me(self):
+        self.assertEqual(self.client.get("/api/users/me/orgs/").status_code, 401)
+        self.assertEqual(self.client.get("/api/users/me/tokens/").status_code, 401)
@@ -15,6 +15,7 @@ router.register("posts", views.PostViewSet, basename="post")
 urlpatterns = [
     path("api/", include(router.urls)),
     path("api/app_version/", views.AppVersionView.as_view()),
+    path("api/search/", views.SearchView.as_view()),
     # path("", views.IndexView.as_view()),
     path("redirect/", views.RedirectView.as_view()),
 ]
\ No newline at end of file
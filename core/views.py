@@ -1,11 +1,28 @@
+import base64
+import hashlib
+from datetime import datetime
+from functools import partial
+from types import SimpleNamespace
+
 from django.contrib.auth import get_user_model
 from django.db import IntegrityError
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import F, Func, OuterRef, Q, Subquery
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from django.views.generic.base import TemplateView
 from rest_framework import filters, mixins, pagination, status, views, viewsets
+from rest_framework.exceptions import NotFound, ParseError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework_extensions.mixins import NestedViewSetMixin
 
+from core.cache import OrgDirectoryCacheMixin, get_org_directory_last_modified, get_org_directory_version
 from core.permissions import NestedUserAccessPolicy, UserAccessPolicy
+from core.renderers import FastJSONRenderer
 
 from . import models, serializers
 
@@ -15,10 +32,230 @@ class IndexView(TemplateView):
 
 class RedirectView(TemplateView):
     template_name = "core/redirect.html"
+
+
+# Past this many rows, sorting every matching key beats reading each partition's first rows.
+PARTITIONED_KEYS_MAX = 200
+
+
+def select_by_keys(queryset, start, stop, partitions=None):
+    """
+    queryset[start:stop], selected by primary key from a keys-only copy of the slice. The planner can
+    read the keys from an index alone; asked for the full rows and their joins, it may instead walk
+    the whole date index looking for the first few that match.
+
+    ``partitions`` is a (field, queryset) pair splitting the rows by ``field``, such as the user's
+    orgs for their feed. For early pages, the keys are then taken from the first ``stop`` rows of each
+    partition, each read from its own index range, however the partitions' rows are spread over the
+    whole ordering.
+    """
+    keys = queryset
+    if partitions is not None and stop <= PARTITIONED_KEYS_MAX:
+        field, values = partitions
+        model = queryset.model
+        first = queryset.filter(**{field: OuterRef("pk")}).values("pk")[:stop]
+        unnest = Func(Subquery(first), template="unnest(ARRAY%(expressions)s)", output_field=model._meta.pk)
+        candidates = values.values_list(unnest)
+        # The candidates already passed the queryset's filters; repeating them lets the planner scan
+        # every matching row instead of looking the candidates up by key.
+        ordering = queryset.query.order_by or model._meta.ordering
+        keys = model._base_manager.filter(pk__in=candidates).order_by(*ordering)
+    return queryset.filter(pk__in=keys.values("pk")[start:stop])
+
+
+class KeysFirstPaginator(Paginator):
+    def __init__(self, *args, partitions=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.partitions = partitions
+
+    def page(self, number):
+        page = super().page(number)
+        if self.count:
+            page.object_list = select_by_keys(
+                self.object_list, page.start_index() - 1, page.end_index(), self.partitions
+            )
+        return page
+
+
 class SmallPages(pagination.PageNumberPagination):
     page_size = 20
 
 
+class FeedPages(SmallPages):
+    # See select_by_keys(); set by the view.
+    partitions = None
+
+    @property
+    def django_paginator_class(self):
+        return partial(KeysFirstPaginator, partitions=self.partitions)
+
+
+class KeysetPages(pagination.BasePagination):
+    """
+    Cursor pagination over (date, id), newest first. Seeks with a row comparison instead of
+    COUNT/OFFSET, so every page costs the same and new posts don't shift page boundaries.
+    Clients opt in by passing the cursor parameter; an empty one asks for the first page.
+    """
+
+    page_size = 20
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+    date_field = "date"
+    # See select_by_keys(); set by the view.
+    partitions = None
+
+    def encode_cursor(self, obj, reverse):
+        if isinstance(obj, dict):
+            # A .values() row, from FastListMixin.
+            obj = SimpleNamespace(**obj)
+        raw = f"{'r' if reverse else 'f'}|{getattr(obj, self.date_field).isoformat()}|{obj.pk}"
+        cursor = base64.urlsafe_b64encode(raw.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return False, None, None
+        try:
+            direction, date, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+            return direction == "r", datetime.fromisoformat(date), int(pk)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_page_queryset(self, queryset, request):
+        reverse, date, pk = self.decode_cursor(request)
+        field = self.date_field
+        if date is None:
+            return queryset.order_by(f"-{field}", "-pk")
+        # The redundant date bound gives the planner an index range to seek on.
+        if reverse:
+            q = Q(**{f"{field}__gt": date}) | Q(**{field: date, "pk__gt": pk})
+            return queryset.filter(q, **{f"{field}__gte": date}).order_by(field, "pk")
+        q = Q(**{f"{field}__lt": date}) | Q(**{field: date, "pk__lt": pk})
+        return queryset.filter(q, **{f"{field}__lte": date}).order_by(f"-{field}", "-pk")
+
+    def get_page_keys(self, queryset, request):
+        """The (id, date) of every row on the page, for conditional requests."""
+        queryset = self.get_page_queryset(queryset, request)
+        queryset = select_by_keys(queryset, 0, self.page_size + 1, self.partitions)
+        return list(queryset.values_list("pk", self.date_field))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        reverse, date, pk = self.decode_cursor(request)
+        queryset = self.get_page_queryset(queryset, request)
+
+        results = list(select_by_keys(queryset, 0, self.page_size + 1, self.partitions))
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.next = self.previous = None
+        if results:
+            if has_more or reverse:
+                self.next = self.encode_cursor(results[-1], reverse=False)
+            if date is not None and (has_more or not reverse):
+                self.previous = self.encode_cursor(results[0], reverse=True)
+        if date is not None and not results:
+            self.previous = replace_query_param(self.base_url, self.cursor_query_param, "")
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.next, "previous": self.previous, "results": data})
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "schema": {"type": "string"},
+            }
+        ]
+
+
+class FeedKeysetPages(KeysetPages):
+    date_field = "feed_date"
+
+
+class ConditionalGetMixin:
+    """
+    Adds ETag/Last-Modified to list and retrieve, and answers If-None-Match/If-Modified-Since
+    with a 304 before the response is built. Views implement get_conditional_state().
+    """
+
+    def get_conditional_state(self):
+        """Return (etag parts, last modified timestamp), or None to skip conditional handling."""
+        return None
+
+    def get_etag(self, *parts):
+        request = self.request
+        parts = (
+            self.basename,
+            self.action,
+            request.get_host(),
+            request.accepted_renderer.format,
+            sorted(request.query_params.lists()),
+            *parts,
+        )
+        return quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+
+    def conditional_response(self, handler, *args, **kwargs):
+        state = self.get_conditional_state()
+        if state is None:
+            return handler(*args, **kwargs)
+
+        etag_parts, last_modified = state
+        etag = self.get_etag(*etag_parts)
+        response = get_conditional_response(self.request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(*args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+
+class FastListMixin:
+    """
+    With settings.FAST_LIST_SERIALIZATION, lists are read with ``.values()`` and built by a
+    ValuesPlan compiled from the view's serializer, then encoded by FastJSONRenderer. The output is
+    the same as the serializer's; serializers that can't be compiled take the regular path.
+    """
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if settings.FAST_LIST_SERIALIZATION:
+            return [FastJSONRenderer() if type(r) is JSONRenderer else r for r in renderers]
+        return renderers
+
+    def get_fast_list_lookups(self):
+        """Extra columns the paginator reads from each row."""
+        return ()
+
+    def list(self, request, *args, **kwargs):
+        plan = None
+        if settings.FAST_LIST_SERIALIZATION:
+            plan = serializers.compile_values_plan(self.get_serializer())
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = plan.queryset(self.filter_queryset(self.get_queryset()), *self.get_fast_list_lookups())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(plan.render(page))
+        return Response(plan.render(queryset))
+
+
 class NestedUserViewSetMixin(NestedViewSetMixin):
     def get_parents_query_dict(self):
         kw = super().get_parents_query_dict()
@@ -28,6 +265,12 @@ class NestedUserViewSetMixin(NestedViewSetMixin):
         return kw
 
     def get_user(self):
+        # The access policy and perform_create() both ask, so resolve once per request.
+        if not hasattr(self, "_nested_user"):
+            self._nested_user = self.resolve_user()
+        return self._nested_user
+
+    def resolve_user(self):
         qdict = self.get_parents_query_dict()
         for key in ("user", "users"):
             try:
@@ -37,22 +280,56 @@ class NestedUserViewSetMixin(NestedViewSetMixin):
                 pass
         else:
             return None
+        user = self.request.user
+        if user_id is None:
+            # "me" for an anonymous request.
+            return None
+        if user.is_authenticated and str(user_id) == str(user.id):
+            return user
         return get_user_model().objects.get(pk=user_id)
 
 
-class UserViewSet(viewsets.ReadOnlyModelViewSet, mixins.UpdateModelMixin):
+class UserViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet, mixins.UpdateModelMixin):
     permission_classes = (UserAccessPolicy,)
     serializer_class = serializers.UserSerializer
 
     @property
     def access_policy(self):
         return self.permission_classes[0]
+    def get_conditional_state(self):
+        user = self.request.user
+        # The nested org names are only versioned across processes when the cache is shared.
+        if self.action != "retrieve" or not self.is_me() or not settings.ORG_CACHE_SHARED:
+            return None
+        fields = [getattr(user, f) for f in serializers.UserSerializer.Meta.fields if f != "memberships"]
+        # get_object() has already prefetched these for the response.
+        orgs = [m.organization_id for m in self.get_object().memberships.all()]
+        return (fields, orgs, get_org_directory_version()), None
+
+    def is_me(self):
+        user = self.request.user
+        return user.is_authenticated and str(self.kwargs.get("pk")) in ("me", str(user.id))
+
     def get_object(self):
-        if self.kwargs.get("pk") == "me":
-            self.kwargs["pk"] = self.request.user.id
-        return super().get_object()
+        # The access policy asks before the view does, so resolve once per request.
+        if not hasattr(self, "_object"):
+            self._object = self.resolve_object()
+        return self._object
+
+    def resolve_object(self):
+        if not self.is_me():
+            return super().get_object()
+        # request.user is already loaded; only the related data the response needs is missing.
+        self.kwargs["pk"] = self.request.user.id
+        user = self.request.user
+        if self.request.method in SAFE_METHODS:
+            serializers.prefetch_for(self.get_serializer(), [user])
+        self.check_object_permissions(self.request, user)
+        return user
     def get_queryset(self):
         qs = get_user_model().objects.all()
+        if self.request.method in SAFE_METHODS:
+            qs = serializers.optimize_queryset(self.get_serializer(), qs)
         if self.action == "list":
             return self.access_policy.scope_queryset(self.request, qs)
         else:
@@ -71,7 +348,11 @@ class ExpoPushTokenViewSet(
 
 
 class MembershipViewSet(
-    NestedUserViewSetMixin, viewsets.ReadOnlyModelViewSet, mixins.CreateModelMixin, mixins.DestroyModelMixin
+    NestedUserViewSetMixin,
+    FastListMixin,
+    viewsets.ReadOnlyModelViewSet,
+    mixins.CreateModelMixin,
+    mixins.DestroyModelMixin,
 ):
     permission_classes = (NestedUserAccessPolicy,)
     queryset = models.Membership.objects.all()
@@ -82,6 +363,12 @@ class MembershipViewSet(
             return serializers.CreateMembershipSerializer
         return serializers.MembershipSerializer
 
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.request.method in SAFE_METHODS:
+            qs = serializers.optimize_queryset(self.get_serializer(), qs)
+        return qs
+
     def perform_create(self, serializer):
         serializer.save(user=self.get_user())
 
@@ -94,25 +381,135 @@ class MembershipViewSet(
         return super().handle_exception(exc)
 
 
-class OrganizationViewSet(viewsets.ReadOnlyModelViewSet):
+class OrganizationViewSet(
+    ConditionalGetMixin, OrgDirectoryCacheMixin, FastListMixin, viewsets.ReadOnlyModelViewSet
+):
     serializer_class = serializers.OrganizationSerializer
+    uncached_params = ("user",)
+
+    def get_conditional_state(self):
+        # Another process's directory version says nothing about this one's unless the cache is shared.
+        if not self.is_cacheable() or not settings.ORG_CACHE_SHARED:
+            return None
+        return (get_org_directory_version(), self.kwargs.get("pk")), get_org_directory_last_modified()
 
     def get_queryset(self):
+        qs = serializers.optimize_queryset(self.get_serializer(), models.Organization.objects.all())
+
         if "clubs" in self.request.query_params:
             # TODO: Deprecated. Remove when app is updated.
-            return models.Organization.objects.filter(type=3)
+            return qs.filter(type=3)
 
         if "user" in self.request.query_params:
             # TODO: Deprecated. Remove when app is updated.
-            return models.Organization.objects.filter(users=self.request.user)
+            return qs.filter(users=self.request.user)
 
-        return models.Organization.objects.all()
+        return qs
     
-class PostViewSet(viewsets.ReadOnlyModelViewSet):
+class PostViewSet(ConditionalGetMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = serializers.PostSerializer
-    pagination_class = SmallPages
+
+    @property
+    def pagination_class(self):
+        # Page numbers stay the default, which the released app reads; ?cursor= opts in to keyset pages.
+        if KeysetPages.cursor_query_param not in self.request.query_params:
+            return FeedPages
+        if settings.POST_FEED_MATERIALIZED:
+            return FeedKeysetPages
+        return KeysetPages
+
+    @property
+    def paginator(self):
+        paginator = super().paginator
+        if paginator is not None and not settings.POST_FEED_MATERIALIZED:
+            # A page's posts come from each of the user's orgs' own (organization, date, id) index ranges.
+            orgs = models.Organization.objects.filter(memberships__user=self.request.user)
+            paginator.partitions = ("organization", orgs)
+        return paginator
+
+    def get_fast_list_lookups(self):
+        if isinstance(self.paginator, KeysetPages):
+            return ("pk", self.paginator.date_field)
+        return ()
+
+    def get_serializer_class(self):
+        if self.request.query_params.get("view") == "summary":
+            return serializers.PostSummarySerializer
+        return serializers.PostSerializer
+
     def get_queryset(self):
-        return models.Post.objects.filter(published=True, organization__users=self.request.user)
+        if settings.POST_FEED_MATERIALIZED:
+            # Reads one (user, date) range of the materialized feed.
+            qs = models.Post.objects.filter(feed_entries__user=self.request.user)
+            qs = qs.annotate(feed_date=F("feed_entries__date"))
+        else:
+            # An IN subquery instead of a join lets the planner walk the (date, id) index and stop early.
+            orgs = models.Membership.objects.filter(user=self.request.user).values("organization_id")
+            qs = models.Post.objects.filter(published=True, organization__in=orgs)
+        # The keyset paginator reads the date of every row, even when ?fields= leaves it out.
+        return serializers.optimize_queryset(self.get_serializer(), qs, extra_fields=("date",))
+
+    def get_conditional_state(self):
+        # Only keyset pages: their validator is the page's own keys, read from the index, where a page
+        # number's would need another pass over the whole feed. Posts nest their org's name, which is
+        # only versioned across processes when the cache is shared.
+        if self.action != "list" or not isinstance(self.paginator, KeysetPages):
+            return None
+        if not settings.ORG_CACHE_SHARED:
+            return None
+        keys = self.paginator.get_page_keys(self.get_queryset(), self.request)
+        return (self.request.user.id, keys, get_org_directory_version()), None
+
+class SearchView(FastListMixin, views.APIView):
+    """
+    Ranked full-text search over the org directory and the posts the user can see. ``q`` takes
+    web-search syntax (quoted phrases, or, -word); ``limit`` caps each list.
+    """
+
+    default_limit = 10
+    max_limit = 50
+    # Posts are ranked among this many most recent matches, not all of them: a common word matches
+    # most of a feed, and reading every match to rank it grew with the feed.
+    ranked_posts = 50
+
+    def get(self, request):
+        text = request.query_params.get("q", "").strip()
+        try:
+            limit = min(int(request.query_params.get("limit", self.default_limit)), self.max_limit)
+        except ValueError:
+            raise ParseError("limit must be an integer.")
+        if not text or limit < 1:
+            return Response({"organizations": [], "posts": []})
+
+        # One serializer of each kind, for both the queryset and the output: building their fields
+        # costs about as much as the search queries.
+        context = {"request": request}
+        org_list = serializers.OrganizationSerializer(many=True, context=context)
+        post_list = serializers.PostSerializer(many=True, context=context)
+
+        orgs = serializers.optimize_queryset(org_list.child, models.Organization.objects.all())
+        orgs = orgs.search(text).order_by("-rank", "name")[:limit]
+        # Same visibility as the post feed: published posts of the user's organizations.
+        visible = models.Membership.objects.filter(user=request.user).values("organization_id")
+        posts = models.Post.objects.filter(published=True, organization__in=visible)
+        posts = serializers.optimize_queryset(post_list.child, posts)
+        partitions = ("organization", models.Organization.objects.filter(memberships__user=request.user))
+        recent = posts.search(text).order_by("-date", "-id")
+        posts = select_by_keys(recent, 0, max(limit, self.ranked_posts), partitions)
+        posts = posts.order_by("-rank", "-date", "-id")[:limit]
+
+        results = {"organizations": (org_list, orgs), "posts": (post_list, posts)}
+        data = {}
+        for name, (serializer, queryset) in results.items():
+            plan = None
+            if settings.FAST_LIST_SERIALIZATION:
+                plan = serializers.compile_values_plan(serializer.child)
+            if plan is None:
+                data[name] = serializer.to_representation(queryset)
+            else:
+                data[name] = plan.render(plan.queryset(queryset))
+        return Response(data)
+
 
 class AppVersionView(views.APIView):
     permission_classes = ()
@@ -0,0 +1,10 @@
+"""
+The admin's URLs, loaded on the first request under /admin/ or reverse("admin:...") rather than
+with the rest of the URLconf. With LAZY_ADMIN this is also where admin.py modules get imported.
+"""
+
+from django.contrib import admin
+
+admin.autodiscover()
+
+urlpatterns = admin.site.get_urls()
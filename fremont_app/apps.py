@@ -1,5 +1,13 @@
-from django.contrib.admin.apps import AdminConfig
+from django.conf import settings
+from django.contrib.admin.apps import SimpleAdminConfig
 
 
-class CoreAdminConfig(AdminConfig):
-    default_site = "fremont_app.admin.CoreAdmin"
\ No newline at end of file
+class CoreAdminConfig(SimpleAdminConfig):
+    """The admin, discovering admin.py modules at startup unless LAZY_ADMIN (see fremont_app.admin_urls)."""
+
+    default_site = "fremont_app.admin.CoreAdmin"
+
+    def ready(self):
+        super().ready()
+        if not settings.LAZY_ADMIN:
+            self.module.autodiscover()
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
 import os
+import tempfile
 from dotenv import load_dotenv
 from pathlib import Path
 from datetime import timedelta
@@ -53,6 +54,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so it times everything below; unused unless REQUEST_PROFILING is on.
+    "core.profiling.ProfilingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -88,22 +91,90 @@ WSGI_APPLICATION = 'fremont_app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# Database connections
+# DB_CONN_MODE picks how connections are managed (core/postgresql/base.py):
+#   request    - a new connection for every request (Django's default).
+#   persistent - keep each worker's connection open for DB_CONN_MAX_AGE seconds, checking that it is
+#                still alive before reusing it unless DB_CONN_HEALTH_CHECKS is false.
+#   pool       - hand connections back to a per-process psycopg2 pool after each request, keeping up
+#                to DB_POOL_MIN_SIZE idle ones. Once DB_POOL_MAX_SIZE connections are in use, a request
+#                waits up to DB_POOL_TIMEOUT seconds for one to be handed back.
+#   pgbouncer  - persistent connections to PgBouncer in transaction pooling mode. Server-side cursors
+#                are disabled, since PgBouncer may move the next fetch to another server connection.
+DB_CONN_MODE = os.environ.get("DB_CONN_MODE", "request")
+
+
+def connection_options(mode):
+    max_age = int(os.environ.get("DB_CONN_MAX_AGE", 600))
+    health_checks = os.environ.get("DB_CONN_HEALTH_CHECKS", "True").lower() == "true"
+    if mode == "request":
+        return {"CONN_MAX_AGE": 0}
+    if mode == "persistent":
+        return {"CONN_MAX_AGE": max_age, "CONN_HEALTH_CHECKS": health_checks}
+    if mode == "pool":
+        pool = (int(os.environ.get("DB_POOL_MIN_SIZE", 1)), int(os.environ.get("DB_POOL_MAX_SIZE", 10)))
+        return {
+            "CONN_MAX_AGE": 0,
+            "CONN_HEALTH_CHECKS": health_checks,
+            "POOL": pool,
+            "POOL_TIMEOUT": float(os.environ.get("DB_POOL_TIMEOUT", 30)),
+        }
+    if mode == "pgbouncer":
+        return {
+            "CONN_MAX_AGE": max_age,
+            "CONN_HEALTH_CHECKS": health_checks,
+            "DISABLE_SERVER_SIDE_CURSORS": True,
+        }
+    raise ValueError(f"Unknown DB_CONN_MODE {mode!r}")
+
+
 DATABASES = {
     # 'default': {
     #     'ENGINE': 'django.db.backends.sqlite3',
     #     'NAME': BASE_DIR / 'db.sqlite3',
     # }
     'default': {
-        'ENGINE': 'django.db.backends.postgresql_psycopg2',
+        'ENGINE': 'core.postgresql',
         'NAME': os.environ.get("DB_NAME"),
         'USER': os.environ.get("DB_USER"),
         'PASSWORD': os.environ.get("DB_PASSWORD"),
         'HOST': os.environ.get("DB_HOST"),
         'PORT': os.environ.get("DB_PORT"),
+        **connection_options(DB_CONN_MODE),
+}
+
 }
 
+
+# Caches
+# The org directory cache is selected with ORG_CACHE_URL: locmem://, file:///path/to/dir or
+# redis://host:port/db (any Redis-compatible server, requires the redis package).
+
+
+def cache_config(url):
+    if url.startswith("file://"):
+        return {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": url[len("file://") :],
+        }
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return {"BACKEND": "core.cache.RedisCache", "LOCATION": url}
+    return {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": url[len("locmem://") :]}
+
+
+ORG_CACHE_ALIAS = "orgs"
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    ORG_CACHE_ALIAS: cache_config(os.environ.get("ORG_CACHE_URL", "locmem://orgs")),
 }
 
+# A locmem cache is private to each process, and a change to the directory only invalidates the
+# process that made it. So rendered org responses are only cached there when ORG_CACHE_TIMEOUT is set,
+# and every other process may serve a stale directory for that long. Shared backends keep them a day.
+ORG_CACHE_SHARED = not CACHES[ORG_CACHE_ALIAS]["BACKEND"].endswith(".LocMemCache")
+ORG_CACHE_TIMEOUT = int(os.environ.get("ORG_CACHE_TIMEOUT", 24 * 60 * 60 if ORG_CACHE_SHARED else 0))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -159,7 +230,7 @@ AUTHENTICATION_BACKENDS = [
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "core.authentication.ClaimsJWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
@@ -182,6 +253,7 @@ DJOSER = {
         "user": "core.serializers.UserSerializer",
         "current_user": "core.serializers.UserSerializer",
     },
+    "SOCIAL_AUTH_TOKEN_STRATEGY": "core.authentication.TokenStrategy",
 }
 
 SOCIAL_AUTH_GOOGLE_WHITELISTED_DOMAINS = ["fuhsd.org", "student.fuhsd.org"]
@@ -195,6 +267,61 @@ SOCIAL_AUTH_USERNAME_IS_FULL_EMAIL = True
 
 SIMPLE_JWT = {"ACCESS_TOKEN_LIFETIME": timedelta(weeks=16)}
 
+# Access tokens carry the user's type, grad_year and staff flags (core.authentication). A request
+# is authenticated from them without loading the user once this process has checked the same claims
+# against the database within this many seconds; deactivations and role changes made elsewhere
+# apply after at most that long. 0 loads the user on every request.
+JWT_CLAIMS_CHECK_TTL = int(os.environ.get("JWT_CLAIMS_CHECK_TTL", 60))
+
+# Post feed
+# When enabled, each user's feed is materialized into core.FeedEntry on write. Run
+# `manage.py rebuild_feeds` after turning it on.
+
+POST_FEED_MATERIALIZED = os.environ.get("POST_FEED_MATERIALIZED", "False").lower() == "true"
+
+# API
+# Build post, org and membership lists from .values() rows instead of serializer instances, and
+# encode them with orjson when it's installed. The output is the same either way.
+
+FAST_LIST_SERIALIZATION = os.environ.get("FAST_LIST_SERIALIZATION", "False").lower() == "true"
+
+# Admin
+# Import admin.py modules on the first admin request instead of at startup, which keeps the admin out
+# of the serverless function's cold starts. Leave it off where `manage.py check` should cover the
+# ModelAdmins.
+
+LAZY_ADMIN = os.environ.get("LAZY_ADMIN", "False").lower() == "true"
+
+# Profiling
+# REQUEST_PROFILING appends a record per request, with its time and query counts, to
+# REQUEST_PROFILE_LOG for `manage.py profile_report`, and adds them as a Server-Timing header to the
+# responses of staff users (of every user with DEBUG on). A REQUEST_PROFILE_SAMPLE_RATE share of
+# requests (0 to 1) also runs under cProfile, with the stats saved to REQUEST_PROFILE_DIR.
+
+REQUEST_PROFILING = os.environ.get("REQUEST_PROFILING", "False").lower() == "true"
+REQUEST_PROFILE_DIR = os.environ.get(
+    "REQUEST_PROFILE_DIR", os.path.join(tempfile.gettempdir(), "fremont-profiles")
+)
+REQUEST_PROFILE_LOG = os.environ.get(
+    "REQUEST_PROFILE_LOG", os.path.join(REQUEST_PROFILE_DIR, "requests.jsonl")
+)
+REQUEST_PROFILE_SAMPLE_RATE = float(os.environ.get("REQUEST_PROFILE_SAMPLE_RATE", 0))
+
+# Push notifications
+
+EXPO_PUSH_API_URL = os.environ.get("EXPO_PUSH_API_URL", "https://exp.host/--/api/v2/push")
+EXPO_ACCESS_TOKEN = os.environ.get("EXPO_ACCESS_TOKEN")
+EXPO_PUSH_TIMEOUT = float(os.environ.get("EXPO_PUSH_TIMEOUT", 10))
+EXPO_PUSH_RETRIES = int(os.environ.get("EXPO_PUSH_RETRIES", 3))
+EXPO_PUSH_BACKOFF = float(os.environ.get("EXPO_PUSH_BACKOFF", 0.5))
+EXPO_PUSH_MAX_WORKERS = int(os.environ.get("EXPO_PUSH_MAX_WORKERS", 4))
+EXPO_RECEIPT_DELAY = int(os.environ.get("EXPO_RECEIPT_DELAY", 15 * 60))
+EXPO_TOKEN_MAX_FAILURES = int(os.environ.get("EXPO_TOKEN_MAX_FAILURES", 5))
+
+NOTIFICATION_DISPATCH_ON_COMMIT = os.environ.get("NOTIFICATION_DISPATCH_ON_COMMIT", "True").lower() == "true"
+NOTIFICATION_JOB_MAX_ATTEMPTS = int(os.environ.get("NOTIFICATION_JOB_MAX_ATTEMPTS", 5))
+NOTIFICATION_JOB_LOCK_TIMEOUT = int(os.environ.get("NOTIFICATION_JOB_LOCK_TIMEOUT", 300))
+
 CORS_ALLOW_ALL_ORIGINS = True
 
 SESSION_COOKIE_SECURE = not DEBUG
@@ -14,18 +14,32 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
-from django.urls import path
+from django.urls import path, re_path
 from django.urls.conf import include
 from django.conf import settings
 from django.conf.urls.static import static
+from django.urls.resolvers import RoutePattern, URLResolver
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+
+from core import authentication
 
 urlpatterns = [
     path("", include("core.urls")),
-    path('admin/', admin.site.urls),
+    # Like path("admin/", admin.site.urls), but the module isn't imported until an admin URL is
+    # resolved or reversed; namespaced resolvers aren't populated by other lookups.
+    URLResolver(RoutePattern("admin/"), "fremont_app.admin_urls", app_name="admin", namespace="admin"),
     path("accounts/", include("social_django.urls", namespace="social")),
     path("api/auth/", include("rest_framework.urls")),
     path("api/auth/", include("djoser.urls")),
+    # Ahead of djoser's routes, so issued tokens carry the claims core.authentication reads.
+    re_path(
+        r"^api/auth/jwt/create/?",
+        TokenObtainPairView.as_view(serializer_class=authentication.TokenObtainPairSerializer),
+    ),
+    re_path(
+        r"^api/auth/jwt/refresh/?",
+        TokenRefreshView.as_view(serializer_class=authentication.TokenRefreshSerializer),
+    ),
     path("api/auth/", include("djoser.urls.jwt")),
     path("api/auth/", include("djoser.social.urls")),
     
@@ -0,0 +1,93 @@
+"""
+Cold start time of the WSGI application: importing fremont_app.wsgi and loading the URLconf, as the
+first request to a new serverless instance does. Each run is a fresh interpreter started with
+-X importtime; prints the median wall time and where import time goes by top-level package.
+
+Fails if the median exceeds --budget milliseconds, or if a module that should load on first use is
+imported at startup. LAZY_ADMIN is read from the environment like the settings do, so it is off
+unless set, as in the deployment (vercel.json does not set it); set it to measure the lazy admin.
+
+    python scripts/check_cold_start.py
+    LAZY_ADMIN=True python scripts/check_cold_start.py --runs 9 --budget 800
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import Counter
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import fremont_app.wsgi
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(json.dumps({"ms": (time.perf_counter() - start) * 1000, "modules": sorted(sys.modules)}))
+"""
+IMPORT_TIME = re.compile(r"import time:\s+(\d+) \|\s+\d+ \|\s*(\S+)")
+# Only needed by markdown rendering and OAuth sign-in.
+DEFERRED = ("bs4", "core.auth", "social_core.backends.google", "social_core.backends.oauth")
+# Only needed by the admin when LAZY_ADMIN is on.
+DEFERRED_ADMIN = ("core.admin", "django.contrib.auth.admin", "social_django.admin")
+
+
+def cold_start(env):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD],
+        cwd=BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    packages = Counter()
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME.match(line)
+        if match:
+            packages[match[2].split(".")[0]] += int(match[1]) / 1000
+    return {**json.loads(result.stdout.splitlines()[-1]), "packages": packages}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    # About 490 ms on a development machine, with or without LAZY_ADMIN.
+    parser.add_argument("--budget", type=float, default=600, help="Fail if the median exceeds this many ms.")
+    parser.add_argument("--top", type=int, default=15, help="Packages to list.")
+    args = parser.parse_args()
+
+    env = {**os.environ}
+    lazy_admin = env.get("LAZY_ADMIN", "False").lower() == "true"
+    deferred = DEFERRED + (DEFERRED_ADMIN if lazy_admin else ())
+
+    # A throwaway run, so every measured one finds compiled bytecode.
+    cold_start(env)
+    runs = sorted((cold_start(env) for _ in range(args.runs)), key=lambda run: run["ms"])
+    median = runs[len(runs) // 2]
+
+    print(
+        f"cold start, {args.runs} runs: median {median['ms']:.0f} ms, min {runs[0]['ms']:.0f} ms, "
+        f"{len(median['modules'])} modules, {sum(median['packages'].values()):.0f} ms under -X importtime"
+    )
+    print(f"{'package':<28} {'ms':>7}")
+    for package, ms in median["packages"].most_common(args.top):
+        print(f"{package:<28} {ms:>7.1f}")
+
+    failed = False
+    imported = [module for module in deferred if module in median["modules"]]
+    if imported:
+        print(f"Imported at startup, should load on first use: {', '.join(imported)}")
+        failed = True
+    if median["ms"] > args.budget:
+        print(f"OVER BUDGET: {median['ms']:.0f} ms > {args.budget:.0f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Local stand-in for the Expo push API.
+
+    python scripts/fake_expo.py --port 8765 --fail-rate 0.2 --dead-rate 0.1
+    EXPO_PUSH_API_URL=http://localhost:8765 python manage.py dispatch_notifications
+    EXPO_PUSH_API_URL=http://localhost:8765 EXPO_RECEIPT_DELAY=0 python manage.py check_push_receipts
+
+Tokens containing "invalid" are rejected in the send ticket; --dead-rate of the
+remaining tickets come back as DeviceNotRegistered receipts.
+"""
+
+import argparse
+import json
+import random
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEVICE_NOT_REGISTERED = {
+    "status": "error",
+    "message": "The recipient device is not registered with FCM.",
+    "details": {"error": "DeviceNotRegistered"},
+}
+
+
+class Handler(BaseHTTPRequestHandler):
+    fail_rate = 0.0
+    dead_rate = 0.0
+    receipts = {}
+
+    def log_message(self, format, *args):
+        pass
+
+    def respond(self, status, payload, headers=()):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in headers:
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def ticket(self, message):
+        if "invalid" in message["to"]:
+            return {**DEVICE_NOT_REGISTERED, "message": f"{message['to']} is not a valid push token"}
+        id = str(uuid.uuid4())
+        self.receipts[id] = DEVICE_NOT_REGISTERED if random.random() < self.dead_rate else {"status": "ok"}
+        return {"status": "ok", "id": id}
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if random.random() < self.fail_rate:
+            status = random.choice((429, 503))
+            return self.respond(status, {"errors": [{"code": "TOO_MANY_REQUESTS"}]}, [("Retry-After", "0")])
+
+        if self.path.endswith("/send"):
+            print(f"send: {len(payload)} message(s)")
+            return self.respond(200, {"data": [self.ticket(message) for message in payload]})
+        if self.path.endswith("/getReceipts"):
+            print(f"getReceipts: {len(payload['ids'])} id(s)")
+            data = {id: receipt for id in payload["ids"] if (receipt := self.receipts.pop(id, None))}
+            return self.respond(200, {"data": data})
+        self.respond(404, {"errors": [{"code": "NOT_FOUND"}]})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--dead-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    Handler.fail_rate = args.fail_rate
+    Handler.dead_rate = args.dead_rate
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), Handler)
+    print(f"Fake Expo push API on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,3 @@
-import csv
 import os
 import sys
 import django
@@ -15,18 +14,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fremont_app.settings')
 # Initialize Django
 django.setup()
 
-from core.models import Organization, OrganizationType
+from django.core.management import call_command
 
-with open("scripts/clubs.csv", encoding='utf-8') as f:
-    reader = csv.DictReader(f)
-    clubs = list(reader)
-
-for x in clubs:
-    name = x["Club"]
-    obj, _ = Organization.objects.get_or_create(
-        name=name, defaults=dict(type=OrganizationType.CLUB)
-    )
-    obj.description = x["Description"]
-    obj.save()
-
-    print(obj)
+# Kept for existing workflows; the import itself lives in `manage.py import_orgs`.
+call_command("import_orgs", sys.argv[1] if len(sys.argv) > 1 else "scripts/clubs.csv")